@@ -0,0 +1,87 @@
+"""
+Bus throughput benchmark against the pty-backed bus_servo emulator, no arm required.
+
+    python scripts/bench_bus.py --latency 0.002 --baudrate 115200 --n 200
+"""
+import argparse
+import time
+
+from xarm import XArmFollowerConfig
+from xarm.lerobot.xarm_bus import XArmBus
+from xarm.xarm_remote.bus_servo_binary import BusServoSerialBinary
+from xarm.xarm_remote.bus_servo_emulator import BusServoEmulator
+from xarm.xarm_remote.bus_servo_http import BusServoHttp
+from xarm.xarm_remote.bus_servo_http_server import BusServoHttpServer
+from xarm.xarm_remote.bus_servo_serial import BusServoSerial
+
+
+def timeit(name, fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    dt = time.perf_counter() - start
+    print(f'{name:<40} {n / dt:8.1f} calls/s {dt / n * 1e3:8.2f} ms/call')
+
+
+def bench_transports(args):
+    for name, make in [('serial raw get_positions', lambda port: BusServoSerial(port)),
+                       ('serial friendly get_positions', lambda port: BusServoSerial(port, raw_mode=False)),
+                       ('serial binary get_positions', lambda port: BusServoSerialBinary(port))]:
+        with BusServoEmulator(latency=args.latency, baudrate=args.baudrate) as emulator:
+            servo = make(emulator.port)
+            timeit(name, servo.get_positions, args.n)
+
+
+def bench_xarm_bus(args):
+    for connection_type in ['serial', 'serial_binary']:
+        for batched_write in [False, True]:
+            with BusServoEmulator(latency=args.latency, baudrate=args.baudrate) as emulator:
+                config = XArmFollowerConfig(port=emulator.port, connection_type=connection_type,
+                                            batched_write=batched_write)
+                bus = XArmBus(config)
+                bus.connect()
+                targets = [{joint: 300 + 400 * (i % 2) for joint in config.joint2motorid} for i in range(2)]
+                i = iter(range(args.n))
+                timeit(f'XArmBus {connection_type} write batched={batched_write}',
+                       lambda: bus.write_positions(targets[next(i) % 2], servo_runtime=0), args.n)
+
+
+def bench_http(args):
+    joints = [[id, 300] for id in range(1, 7)]
+    with BusServoHttpServer(latency=args.latency) as server:
+        servo = BusServoHttp(server.address)
+        timeit('http get_positions', servo.get_positions, args.n)
+        timeit('http 6 joint write, one GET per joint',
+               lambda: [servo.run(id, p, 0) for id, p in joints], args.n)
+        timeit('http 6 joint write, one POST /batch',
+               lambda: servo.run_batch([('run', [id, p, 0]) for id, p in joints]), args.n)
+    with BusServoEmulator(latency=args.latency, baudrate=args.baudrate) as emulator:
+        servo = BusServoSerial(emulator.port)
+        timeit('serial 6 joint write, one run per joint',
+               lambda: [servo.run(id, p, 0) for id, p in joints], args.n)
+        timeit('serial 6 joint write, run_mult', lambda: servo.run_mult(joints, 0), args.n)
+
+
+def bench_teleop(args):
+    with BusServoEmulator(latency=args.latency, baudrate=args.baudrate) as leader_emulator, \
+         BusServoEmulator(latency=args.latency, baudrate=args.baudrate) as follower_emulator:
+        leader = XArmBus(XArmFollowerConfig(port=leader_emulator.port))
+        follower = XArmBus(XArmFollowerConfig(port=follower_emulator.port, batched_write=True))
+        leader.connect()
+        follower.connect()
+        leader_emulator.servos.set_positions([100, 200, 300, 400, 500, 600], 5000)
+        timeit('teleop tick (leader read + follower write)',
+               lambda: follower.write_positions(leader.read_positions(), servo_runtime=0), args.n)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.002, help='emulated board processing time per command [s]')
+    parser.add_argument('--baudrate', type=int, default=115200)
+    args = parser.parse_args()
+
+    bench_transports(args)
+    bench_xarm_bus(args)
+    bench_http(args)
+    bench_teleop(args)
@@ -0,0 +1,48 @@
+"""
+Planner image path benchmark: per-iteration conversions before and after ImagePrep, without the planner itself.
+
+    python scripts/bench_image_prep.py --n 500 --height 480 --width 640
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from image_prep import ImagePrep
+
+
+def legacy_path(rgb):
+    image = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    planner_image = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)  # CubePlanner.init_image(rotate_img=True)
+    canvas = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+    return planner_image, cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
+
+
+def prep_path(prep, rgb):
+    planner_image = prep.prepare(rgb)
+    return planner_image, prep.to_rgb(prep.canvas())
+
+
+def timeit(name, fn, n):
+    fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    dt = time.perf_counter() - start
+    print(f'{name:<30} {dt / n * 1e3:8.3f} ms/frame')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=500)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--width', type=int, default=640)
+    args = parser.parse_args()
+
+    rgb = np.random.default_rng(0).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    prep = ImagePrep(rgb.shape)
+    for a, b in zip(legacy_path(rgb), prep_path(prep, rgb)):
+        assert np.array_equal(a, b)
+    timeit('legacy (4 allocating passes)', lambda: legacy_path(rgb), args.n)
+    timeit('ImagePrep (buffers reused)', lambda: prep_path(prep, rgb), args.n)
@@ -0,0 +1,120 @@
+"""
+Replays frames archived by run_planner through CubePlanner the way run_planner does, no robot or camera required.
+
+    python scripts/bench_planner.py outputs --simulate-busy 30 --json baseline.json
+    python scripts/bench_planner.py outputs --simulate-busy 30 --expect baseline.json
+
+Busy flags come from the file names (<session>_img_<n>_<busy>..., older archives img_<n>_<0|1>). With
+--simulate-busy N they are replaced by N busy frames after every action, which mimics the robot executing
+it. Frames archived before the planner rotated them (landscape) are rotated like run_planner does. Pass
+the --scale run_planner used, the camera intrinsics are scaled with it.
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from cube_solver import make_cube_planner, planner_step
+from frame_archiver import parse_frame_name
+from frame_gate import FrameGate
+
+
+def load_frames(directory):
+    """(frame number, busy flag, path) of the archived frames, ordered by session and frame number."""
+    frames = []
+    for name in os.listdir(directory):
+        if parsed := parse_frame_name(name):
+            frames.append((*parsed, os.path.join(directory, name)))
+    return [frame[1:] for frame in sorted(frames)]
+
+
+def replay(frames, simulate_busy=None, gate=None, plot=False, scale=1., cube_planner=None):
+    """:param cube_planner: planner to replay through, None makes one like run_planner for scale"""
+    cube_planner = cube_planner or make_cube_planner(scale)
+    timings = {'decode': 0., 'prep': 0.}
+    frame_times = []
+    actions = []
+    skipped = 0
+    busy_left = 0
+    was_busy = None
+    executing_action = ''
+    for n, busy, path in frames:
+        start = time.perf_counter()
+        image = cv2.imread(path)
+        decoded = time.perf_counter()
+        if image.shape[0] < image.shape[1]:
+            image = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+        prepared = time.perf_counter()
+        timings['decode'] += decoded - start
+        timings['prep'] += prepared - decoded
+
+        if simulate_busy is not None:
+            busy, busy_left = busy_left > 0, max(busy_left - 1, 0)
+        if busy:
+            cube_planner.action_executor.current_action = ''
+        if gate is not None and busy != was_busy:
+            gate.force()
+        was_busy = busy
+        if gate is not None and not gate.changed(image):
+            skipped += 1
+        elif action := planner_step(cube_planner, image, busy, timings):
+            # run_planner takes the action once, see its submit
+            cube_planner.action_executor.current_action = ''
+            executing_action = action
+            actions.append((n, action))
+            busy_left = simulate_busy or 0
+
+        if plot:
+            plot_start = time.perf_counter()
+            cube_planner.plot(image.copy(), action=executing_action)
+            timings['plot'] = timings.get('plot', 0.) + time.perf_counter() - plot_start
+        frame_times.append(time.perf_counter() - start)
+
+    frame_times = np.array(frame_times)
+    return {
+        'frames': len(frames),
+        'skipped': skipped,
+        'fps': len(frames) / frame_times.sum() if len(frames) else 0.,
+        'frame_p50_ms': float(np.percentile(frame_times, 50) * 1e3) if len(frames) else 0.,
+        'frame_p95_ms': float(np.percentile(frame_times, 95) * 1e3) if len(frames) else 0.,
+        'stage_mean_ms': {stage: t / max(len(frames), 1) * 1e3 for stage, t in timings.items()},
+        'actions': actions,
+    }
+
+
+def print_report(report):
+    print(f"{report['frames']} frames ({report['skipped']} skipped by the gate), {report['fps']:.1f} fps, "
+          f"p50 {report['frame_p50_ms']:.1f} ms p95 {report['frame_p95_ms']:.1f} ms per frame")
+    for stage, ms in report['stage_mean_ms'].items():
+        print(f'  {stage:<15} {ms:8.2f} ms/frame')
+    print('actions:')
+    for n, action in report['actions']:
+        print(f'  frame {n:>6}: {action}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directory', help='frames archived by run_planner')
+    parser.add_argument('--simulate-busy', type=int, default=None, help='busy frames after each action, overrides the file names')
+    parser.add_argument('--gate', action='store_true', help='put a FrameGate in front of the planner like run_planner')
+    parser.add_argument('--plot', action='store_true', help='include CubePlanner.plot in the timings')
+    parser.add_argument('--scale', type=float, default=1., help='view scale the frames were archived at')
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    parser.add_argument('--expect', default=None, help='report of an earlier run to compare the action sequence with')
+    args = parser.parse_args()
+
+    report = replay(load_frames(args.directory), simulate_busy=args.simulate_busy,
+                    gate=FrameGate() if args.gate else None, plot=args.plot, scale=args.scale)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.expect:
+        with open(args.expect) as f:
+            expected = json.load(f)
+        if [list(a) for a in report['actions']] != [list(a) for a in expected['actions']]:
+            raise SystemExit(f"action sequence differs from {args.expect}: {expected['actions']}")
+        print(f"actions match {args.expect}, fps {report['fps']:.1f} vs {expected['fps']:.1f}")
@@ -0,0 +1,61 @@
+"""
+Offline evaluation of the end pose detector over the action columns of a recorded LeRobot dataset.
+
+    python scripts/eval_end_detection.py --repo-id user/xarm_cube --thresholds 40,55,70,90 --hold-frames 3
+"""
+import argparse
+import time
+
+import torch
+
+from end_position import EndPoseDetector, evaluate_episodes
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+
+
+def load_episodes(dataset):
+    columns = dataset.hf_dataset.select_columns(['action', 'task_index']).with_format('torch')[:]
+    actions = columns['action']
+    task_index = columns['task_index']
+    starts = dataset.episode_data_index['from'].tolist()
+    ends = dataset.episode_data_index['to'].tolist()
+    episodes = [(start, end, dataset.meta.tasks[int(task_index[start])]) for start, end in zip(starts, ends)]
+    return actions, episodes
+
+
+def print_results(results):
+    print(f"{'threshold':>9} {'task':<24} {'episodes':>8} {'missed':>6} {'fp rate':>7} {'frame fp':>8} "
+          f"{'latency mean':>12} {'latency p95':>11}")
+    for threshold, tasks in results.items():
+        for task, m in sorted(tasks.items()):
+            print(f"{threshold:>9.1f} {task[:24]:<24} {m['episodes']:>8} {m['missed']:>6} "
+                  f"{m['false_positive_rate']:>7.1%} {m['frame_false_positive_rate']:>8.2%} "
+                  f"{m['latency_mean_s']:>11.2f}s {m['latency_p95_s']:>10.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repo-id', required=True)
+    parser.add_argument('--root', default=None)
+    parser.add_argument('--library', default=None, help='json end pose library, defaults to the hand tuned poses')
+    parser.add_argument('--thresholds', default=None, help='comma separated max_derivation values to compare')
+    parser.add_argument('--hold-frames', type=int, default=1)
+    parser.add_argument('--tolerance-s', type=float, default=0.5, help='detections this early still count as correct')
+    parser.add_argument('--settle-delta', type=float, default=10., help='joint distance to the final action that counts as settled')
+    args = parser.parse_args()
+
+    if args.library:
+        detector = EndPoseDetector.from_file(args.library, hold_frames=args.hold_frames)
+    else:
+        detector = EndPoseDetector(hold_frames=args.hold_frames)
+    thresholds = [float(t) for t in args.thresholds.split(',')] if args.thresholds else None
+
+    start = time.perf_counter()
+    dataset = LeRobotDataset(args.repo_id, root=args.root)
+    actions, episodes = load_episodes(dataset)
+    loaded = time.perf_counter()
+    with torch.inference_mode():
+        results = evaluate_episodes(detector, actions, episodes, dataset.fps, thresholds=thresholds,
+                                    tolerance_s=args.tolerance_s, settle_delta=args.settle_delta)
+    print(f'{len(episodes)} episodes, {len(actions)} frames: loaded in {loaded - start:.1f} s, '
+          f'evaluated in {time.perf_counter() - loaded:.2f} s')
+    print_results(results)
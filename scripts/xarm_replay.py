@@ -2,15 +2,14 @@ from dataclasses import asdict, dataclass
 from pathlib import Path
 from pprint import pformat
 import logging
-import time
 
 import draccus
 
 from lerobot.datasets.lerobot_dataset import LeRobotDataset
-from lerobot.utils.robot_utils import busy_wait
 from lerobot.utils.utils import init_logging, log_say
 from xarm import XArmFollower
 from xarm.lerobot.config_xarm_follower import XArmFollowerConfig
+from xarm.utils.rate import RateScheduler
 
 
 @dataclass
@@ -46,19 +45,17 @@ def replay(cfg: ReplayConfig):
 
     log_say(f"Replaying episode {cfg.dataset.episode} with {dataset.num_frames} frames", cfg.play_sounds, blocking=True)
     
+    rate = RateScheduler(dataset.fps)
     for idx in range(dataset.num_frames):
-        start_episode_t = time.perf_counter()
-
         action_array = actions[idx]["action"]
         action = {}
         for i, name in enumerate(dataset.features["action"]["names"]):
             action[name] = action_array[i]
 
         robot.send_action(action)
+        rate.sleep()
 
-        dt_s = time.perf_counter() - start_episode_t
-        busy_wait(1 / dataset.fps - dt_s)
-
+    logging.info(f"Replay loop: {rate.summary()}")
     robot.disconnect()
     log_say("Replay completed", cfg.play_sounds, blocking=True)
 
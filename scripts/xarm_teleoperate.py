@@ -4,11 +4,27 @@ import rerun as rr
 import logging
 import draccus
 
-from lerobot.teleoperate import TeleoperateConfig, teleop_loop
+from lerobot.teleoperate import TeleoperateConfig
 from lerobot.utils.utils import init_logging
-from lerobot.utils.visualization_utils import _init_rerun
+from lerobot.utils.visualization_utils import _init_rerun, log_rerun_data
 from xarm import XArmFollower
 from xarm.lerobot.xarm_teleop import XArmLeader
+from xarm.utils.rate import RateScheduler
+
+
+def teleop_loop(teleop, robot, fps, display_data=False, duration=None):
+    """lerobot's teleop_loop on a RateScheduler, which keeps the rate when a bus read overruns a tick."""
+    rate = RateScheduler(fps)
+    try:
+        while duration is None or rate.elapsed < duration:
+            action = teleop.get_action()
+            if display_data:
+                observation = robot.get_observation()
+                log_rerun_data(observation, action)
+            robot.send_action(action)
+            rate.sleep()
+    finally:
+        logging.info(f"Teleop loop: {rate.summary()}")
 
 
 @draccus.wrap()
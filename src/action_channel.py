@@ -0,0 +1,120 @@
+import queue
+import time
+from dataclasses import dataclass, field
+
+import torch.multiprocessing as mp
+
+# planner action names -> action ids understood by the robot process
+ACTION_IDS = {
+    'flip': 1,
+    'rotate_left': 2,
+    'rotate_right': 3,
+    'rotate_upper_left': 4,
+    'rotate_upper_right': 5,
+}
+
+# action id -> (policy task, seconds), 6 re-centers the cube after every other action. There is no right
+# turn task, rotate_upper_right runs the left turn as well.
+action_id2task_and_time = {
+    1: ('Flip the Cube', 20),
+    2: ('Rotate Left Cube', 60),
+    3: ('Rotate Right Cube', 60),
+    4: ('Torn Left Top Cube', 60),
+    5: ('Torn Left Top Cube', 60),
+    6: ('Move Cube to Center', 60),
+}
+
+ACCEPTED, STARTED, FINISHED, FAILED, REJECTED = 'accepted', 'started', 'finished', 'failed', 'rejected'
+
+
+@dataclass
+class ActionCommand:
+    action_id: int
+    seq: int
+    time_budget: float | None = None  # seconds, None keeps the task's default runtime
+    issued_ns: int = field(default_factory=time.time_ns)
+
+
+@dataclass
+class ActionEvent:
+    seq: int
+    action_id: int
+    kind: str
+    timestamp_ns: int = field(default_factory=time.time_ns)
+    info: dict = field(default_factory=dict)
+
+
+class ActionChannel:
+    """
+    Command queue from the planner to the robot process with acknowledgements on the way back.
+
+    The planner submits ActionCommands with a sequence number taken from a shared counter, so numbers stay
+    unique across a restarted planner. The robot answers every command with accepted, started and
+    finished (or failed) events and rejects sequence numbers it already executed, so a command is never
+    run twice. The planner keeps the commands it has no final event for in self.pending.
+    """
+
+    def __init__(self, maxsize=8, command_timeout=180., ctx=mp):
+        """
+        :param command_timeout: forget a pending command after this many seconds without a final event,
+            e.g. because the robot process was restarted while executing it
+        """
+        self.commands = ctx.Queue(maxsize)
+        self.events = ctx.Queue()
+        self._seq = ctx.Value('l', 0)
+        self.command_timeout = command_timeout
+        self.pending: dict[int, ActionCommand] = {}
+        self._last_executed = 0
+
+    # planner side
+
+    def submit(self, action_id, time_budget=None) -> ActionCommand:
+        with self._seq.get_lock():
+            self._seq.value += 1
+            seq = self._seq.value
+        command = ActionCommand(action_id, seq, time_budget)
+        self.commands.put(command)
+        self.pending[seq] = command
+        return command
+
+    def poll_events(self) -> list[ActionEvent]:
+        """Drain all events the robot sent so far and update self.pending."""
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event.kind in (FINISHED, FAILED, REJECTED):
+                self.pending.pop(event.seq, None)
+            events.append(event)
+        now = time.time_ns()
+        for seq, command in list(self.pending.items()):
+            if (now - command.issued_ns) / 1e9 > self.command_timeout:
+                print(f'WARNING no result for action {command.action_id} (seq {seq}) '
+                      f'after {self.command_timeout:.0f} s, dropping it')
+                del self.pending[seq]
+        return events
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.pending)
+
+    # robot side
+
+    def next_command(self, timeout=None) -> ActionCommand | None:
+        """Next command to execute, None if nothing arrived within timeout (0 to poll)."""
+        while True:
+            try:
+                command = self.commands.get(timeout=timeout) if timeout else self.commands.get_nowait()
+            except queue.Empty:
+                return None
+            if command.seq <= self._last_executed:
+                self.report(command, REJECTED, reason=f'seq {command.seq} already executed')
+                continue
+            self._last_executed = command.seq
+            self.report(command, ACCEPTED, queue_s=(time.time_ns() - command.issued_ns) / 1e9)
+            return command
+
+    def report(self, command: ActionCommand, kind, **info):
+        self.events.put(ActionEvent(command.seq, command.action_id, kind, info=info))
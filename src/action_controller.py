@@ -1,113 +1,266 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
+
 import torch
 
 from lerobot.configs import parser
+from lerobot.configs.policies import PreTrainedConfig
 from lerobot.datasets.lerobot_dataset import LeRobotDataset
 from lerobot.datasets.utils import build_dataset_frame, hw_to_dataset_features
 from lerobot.policies.factory import make_policy
 from lerobot.record import RecordConfig
 from lerobot.utils.control_utils import predict_action
-from lerobot.utils.robot_utils import busy_wait
 from lerobot.utils.utils import get_safe_torch_device
 from lerobot.utils.visualization_utils import log_rerun_data, _init_rerun
+from action_channel import FAILED, FINISHED, STARTED, action_id2task_and_time
+from end_position import EndPoseDetector
+from policy_cache import PolicyCache
+from supervisor import beat
 from xarm import XArmFollower
+from xarm.utils.rate import RateScheduler
+
+
+_default_end_poses = EndPoseDetector()
+
+
+def is_position_end_position(position: torch.tensor, max_derivation=70, verbose=False):
+    if verbose:
+        _default_end_poses.explain(position)
+    return bool(_default_end_poses.score(position).min() < max_derivation)
 
 
 class ActController:
     def __init__(self,
                  cfg,
+                 read_budget=0.5,
+                 pipelined=False,
+                 max_action_age=None,
+                 end_detector=None,
+                 task_policies=None,
+                 max_policies=None,
+                 max_policy_memory_mb=None,
         ):
+        """
+        :param read_budget: fraction of a control tick the position read may spend on retries
+        :param pipelined: run inference for the next tick in a worker thread while the current action is sent
+        :param max_action_age: in pipelined mode, drop actions whose observation is older than this many
+            seconds when they are ready to be sent, None allows 3 control ticks
+        :param end_detector: EndPoseDetector that ends a task, defaults to the hand tuned end poses
+        :param task_policies: task -> pretrained policy path, tasks without an entry use cfg.policy
+        :param max_policies: policies kept in memory at once, least recently used ones are evicted
+        :param max_policy_memory_mb: same as max_policies, but capping the parameter memory
+        """
+        self.read_budget = read_budget
+        self.pipelined = pipelined
+        self.max_action_age = max_action_age
+        self._inference = None
+        self.end_detector = end_detector or EndPoseDetector()
         self.follower = XArmFollower(cfg.robot)
         self.follower.connect()
         self.__dataset = LeRobotDataset(
             cfg.dataset.repo_id,
             root=cfg.dataset.root,
         )
-        self.policy = make_policy(cfg.policy, ds_meta=self.__dataset.meta)
+        self.policy_cfg = cfg.policy
+        self.task_policies = task_policies or {}
+        self.policies = PolicyCache(self._load_policy, warm_up=self._warm_up_policy, max_policies=max_policies,
+                                    max_bytes=max_policy_memory_mb and max_policy_memory_mb * 2 ** 20)
+        self.policy = None
         _init_rerun('solving')
         self.set_default_position('flip')
 
     def set_default_position(self, task=""):
         self.follower.move_to_default_position(task=task)
 
-    def execute_task(self, task, shared_img=None, display_data=True, time_task=30):
-        torch.cuda.empty_cache()
-        policy = self.policy
+    def _load_policy(self, task):
+        policy_cfg = self.policy_cfg
+        if task is not None:
+            # every checkpoint brings its own policy config, only where it runs is taken from cfg.policy
+            path = self.task_policies[task]
+            policy_cfg = PreTrainedConfig.from_pretrained(path)
+            policy_cfg.pretrained_path = path
+            policy_cfg.device = self.policy_cfg.device
+            policy_cfg.use_amp = self.policy_cfg.use_amp
+        return make_policy(policy_cfg, ds_meta=self.__dataset.meta)
+
+    def _warm_up_policy(self, policy, task):
+        """Run one inference on a live observation so the first control tick does not pay lazy initialization."""
+        self._predict(self.follower.get_observation(), task or 'flip', policy)
         policy.reset()
+
+    def select_policy(self, task, heartbeat=None):
+        # a policy evicted from the cache is loaded again here, keep the stage alive around it
+        beat(heartbeat)
+        self.policy = self.policies.get(task if task in self.task_policies else None)
+        beat(heartbeat)
+        return self.policy
+
+    def _predict(self, observation, task, policy=None):
+        policy = policy or self.policy
+        observation_frame = build_dataset_frame(self.__dataset.features, observation, prefix="observation")
+        return predict_action(
+            observation_frame,
+            policy,
+            get_safe_torch_device(policy.config.device),
+            policy.config.use_amp,
+            task=task,
+            robot_type=self.follower.robot_type,
+        )
+
+    def warm_up(self, task='flip'):
+        """
+        Load and warm up the task policies that fit the cache and the policy of task, before the stage reports
+        ready, so executing a task does not stall on loading a checkpoint. Returns a fresh observation.
+        """
+        preload = list(self.task_policies)
+        if self.policies.max_policies is not None:
+            preload = preload[:max(self.policies.max_policies - 1, 0)]
+        for other in preload:
+            if other != task:
+                self.select_policy(other)
+        self.select_policy(task)
+        return self.follower.get_observation()
+
+    def execute_task(self, task, shared_frames=None, display_data=True, time_task=30, heartbeat=None):
+        torch.cuda.empty_cache()
+        self.select_policy(task, heartbeat).reset()
+        self.end_detector.reset()
         self.follower.get_observation()
         self.set_default_position(task)
 
-        start_loop_t = time.perf_counter()
-        while time.perf_counter() - start_loop_t < time_task:
-            observation = self.follower.get_observation()
-            observation_frame = build_dataset_frame(self.__dataset.features, observation, prefix="observation")
-            action_values = predict_action(
-                observation_frame,
-                policy,
-                get_safe_torch_device(policy.config.device),
-                policy.config.use_amp,
-                task=task,
-                robot_type=self.follower.robot_type,
-            )
-            if is_position_end_position(action_values):
-                print('END POSITION DETECTED')
-                print(f'ACTION FINISHED {task} execution finished')
-                print(action_values)
-                break
-            action = {key: action_values[i].item() for i, key in enumerate(self.follower.action_features)}
-            self.follower.send_action(action)
-            if display_data:
-                log_rerun_data(observation, action)
-            if shared_img is not None:
-                shared_img.copy_(torch.from_numpy(observation['front']))
-
-            dt_s = time.perf_counter() - start_loop_t
-            # print(1 / self.__dataset.fps - dt_s)
-            busy_wait(1 / self.__dataset.fps - dt_s)
+        if self.pipelined:
+            action_values = self._run_pipelined(task, shared_frames, display_data, time_task, heartbeat)
+        else:
+            action_values = self._run_sequential(task, shared_frames, display_data, time_task, heartbeat)
 
         print(f'ACTION FINISHED {task} execution finished')
         print(action_values)
         self.set_default_position(task)
 
+    def _observe(self):
+        # leave the rest of the tick for inference and actuation
+        observation = self.follower.get_observation(budget_s=self.read_budget / self.__dataset.fps)
+        if self.follower.positions_stale:
+            print('WARNING position read missed its budget, using last known positions')
+        return observation
 
-action_id2task_and_time = {
-    1: ('Flip the Cube', 20),
-    2: ('Rotate Left Cube', 60),
-    3: ('Rotate Right Cube', 60),
-    4: ('Torn Left Top Cube', 60),
-    5: ('Torn Left Top Cube', 60),
-    6: ('Move Cube to Center', 60),
-}
+    def _actuate(self, observation, action_values, shared_frames, display_data):
+        action = {key: action_values[i].item() for i, key in enumerate(self.follower.action_features)}
+        self.follower.send_action(action)
+        if display_data:
+            log_rerun_data(observation, action)
+        if shared_frames is not None:
+            shared_frames.write(observation)
 
+    def _run_sequential(self, task, shared_frames, display_data, time_task, heartbeat):
+        action_values = None
+        rate = RateScheduler(self.__dataset.fps)
+        while rate.elapsed < time_task:
+            beat(heartbeat)
+            observation = self._observe()
+            action_values = self._predict(observation, task)
+            if self.end_detector.update(action_values, task):
+                print('END POSITION DETECTED')
+                break
+            self._actuate(observation, action_values, shared_frames, display_data)
+            rate.sleep()
+        print(f'control loop {rate.summary()}')
+        return action_values
 
-def run_robot(cfg, shared_img, busy, action):
+    def _run_pipelined(self, task, shared_frames, display_data, time_task, heartbeat):
+        """
+        Inference for the observation of tick t runs in a worker thread while the action of tick t-1 is
+        sent, logged and the next observation is read. At most one inference is in flight and it always
+        gets the newest observation, so observations never queue up. An action whose observation is
+        older than max_action_age when it is ready gets dropped instead of sent.
+        """
+        fps = self.__dataset.fps
+        max_action_age = self.max_action_age or 3 / fps
+        if self._inference is None:
+            self._inference = ThreadPoolExecutor(max_workers=1, thread_name_prefix="act-inference")
+        action_values = None
+        in_flight = None  # (future, observation, observation time)
+        dropped = 0
+        rate = RateScheduler(fps)
+        try:
+            while rate.elapsed < time_task:
+                beat(heartbeat)
+                observation = self._observe()
+                previous = in_flight
+                if previous is not None:
+                    action_values = previous[0].result()
+                in_flight = (self._inference.submit(self._predict, observation, task), observation, time.perf_counter())
+
+                if previous is not None:
+                    if self.end_detector.update(action_values, task):
+                        print('END POSITION DETECTED')
+                        break
+                    if time.perf_counter() - previous[2] > max_action_age:
+                        dropped += 1
+                    else:
+                        self._actuate(previous[1], action_values, shared_frames, display_data)
+                rate.sleep()
+        finally:
+            if in_flight is not None:
+                # the policy must be idle before the next task resets it
+                in_flight[0].result()
+        print(f'control loop {rate.summary()}')
+        if dropped:
+            print(f'WARNING dropped {dropped} actions older than {max_action_age * 1000:.0f} ms')
+        return action_values
+
+    def close(self):
+        if self._inference is not None:
+            self._inference.shutdown()
+            self._inference = None
+
+
+def run_robot(cfg, shared_frames, channel, end_positions=None, end_hold_frames=1, ready=None, heartbeat=None,
+              **controller_kwargs):
+    """
+    :param end_positions: json end pose library for EndPoseDetector.from_file, None uses the hand tuned poses
+    :param end_hold_frames: consecutive end pose predictions that end a task
+    :param controller_kwargs: passed on to ActController
+    """
     print('starting run')
-    controller = ActController(cfg)
+    if end_positions is not None:
+        end_detector = EndPoseDetector.from_file(end_positions, hold_frames=end_hold_frames)
+    else:
+        end_detector = EndPoseDetector(hold_frames=end_hold_frames)
+    controller = ActController(cfg, end_detector=end_detector, **controller_kwargs)
+    shared_frames.write(controller.warm_up())
+    if ready is not None:
+        ready.set()
     while True:
-        try:
-            if action.value == 0:
+        beat(heartbeat)
+        command = channel.next_command(timeout=0)
+        if command is None:
+            try:
                 observation = controller.follower.get_observation()
                 log_rerun_data(observation, dict())
-                shared_img.copy_(torch.from_numpy(observation['front']))
-            else:
-                with busy.get_lock():
-                    busy.value = True
-
+                shared_frames.write(observation)
+            except Exception as e:
+                print(f'Got Exception {e}')
+            continue
 
-                task, time_task = action_id2task_and_time[action.value]
-                print(f"executing action {task} with RUNTIME {time_task}")
-                controller.execute_task(task=task, time_task=time_task, shared_img=shared_img)
+        start = time.perf_counter()
+        try:
+            channel.report(command, STARTED)
+            task, time_task = action_id2task_and_time[command.action_id]
+            time_task = command.time_budget or time_task
+            print(f"executing action {task} with RUNTIME {time_task}")
+            controller.execute_task(task=task, time_task=time_task, shared_frames=shared_frames,
+                                    heartbeat=heartbeat)
 
-                task, time_task = action_id2task_and_time[6]
-                print(f"executing action {task} with RUNTIME {time_task}")
-                controller.execute_task(task=task, time_task=time_task, shared_img=shared_img)
+            task, time_task = action_id2task_and_time[6]
+            print(f"executing action {task} with RUNTIME {time_task}")
+            controller.execute_task(task=task, time_task=time_task, shared_frames=shared_frames,
+                                    heartbeat=heartbeat)
         except Exception as e:
             print(f'Got Exception {e}')
-        finally:
-            if busy.value:
-                with busy.get_lock():
-                    busy.value = False
-
+            channel.report(command, FAILED, error=str(e), duration_s=time.perf_counter() - start)
+        else:
+            channel.report(command, FINISHED, duration_s=time.perf_counter() - start)
 
 
 if __name__ == '__main__':
@@ -119,28 +272,3 @@ if __name__ == '__main__':
     if cfg.display_data:
         _init_rerun(session_name="recording")
     controller.execute_task('flip', display_data=True)
-
-
-def is_position_end_position(position: torch.tensor, max_derivation=70, verbose=False):
-    # Heuristics
-    position = position
-    weights = [torch.asarray([0, 1, .05, .1, .8, .2]),
-               torch.asarray([0.3, 1.0, .6, .0, .4, .5]),
-               torch.asarray([0.3, 1.0, .6, .0, .4, .5]),
-               ]
-    targets = [torch.asarray([0, 500., 185., 900., 870., 500.]),
-               torch.asarray([50, 950, 50, 650, 500, 500]),
-               torch.asarray([50, 150, 50, 650, 500, 500]),
-               ]
-
-    for (weight, target) in zip(weights, targets):
-        abs_derivation =  weight @ (position - target).abs()
-        if verbose:
-            for i in range(6):
-                print(f'[{i}] target {target[i]:1.1f} pos {position[i]:1.1f} '
-                      f'diff {target[i] - position[i]:1.1f} '
-                      f'diff weight {(target[i] - position[i])*weight[i]:1.1f}')
-            print(f'=> abs_derivation = {abs_derivation:1.1f}')
-        if abs_derivation < max_derivation:
-            return True
-    return False
\ No newline at end of file
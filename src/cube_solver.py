@@ -1,65 +1,132 @@
 import time
-import os
+from collections import deque
+
 from rubikvision.cube_solver import CubePlanner
 import numpy as np
-import cv2
 
 from lerobot.utils.visualization_utils import log_rerun_data, _init_rerun
+from action_channel import ACTION_IDS
+from frame_archiver import FrameArchiver
+from frame_gate import FrameGate
+from image_prep import ImagePrep
+from primitive_optimizer import optimize
+from supervisor import beat
+
+
+def make_cube_planner(scale=1.):
+    K = np.array([[632.11326486, 0., 316.16980761],
+                  [0., 630.54696352, 233.72252151],
+                  [0., 0., 1.]])
+    K[:2] *= scale  # intrinsics were calibrated at full resolution
+    return CubePlanner(K=K, init_thread=False)
+
 
+def planner_step(cube_planner, image, busy, timings=None) -> str:
+    """
+    Detection and state estimation on an ImagePrep prepared (rotated, BGR) image.
+    :param timings: optional dict, seconds spent per stage are added to it
+    :return: the action the planner wants to run next, '' while busy or without one
+    """
+    start = time.perf_counter()
+    cube_planner.init_image(image, rotate_img=False)
+    initialized = time.perf_counter()
+    cube_planner.estimate_step(busy=busy)
+    if timings is not None:
+        timings['init_image'] = timings.get('init_image', 0.) + initialized - start
+        timings['estimate_step'] = timings.get('estimate_step', 0.) + time.perf_counter() - initialized
+    if busy:
+        return ''
+    return cube_planner.action_executor.current_action
 
-def run_planner(shared_img, busy, action, plot_bounding_box=False, plot_projection=False,
-              plot_cube_state=True, rotate_img=True):
+
+def run_planner(shared_frames, channel, plot_bounding_box=False, plot_projection=False,
+              plot_cube_state=True, rotate_img=True, camera='front', scale=1., max_in_flight=1,
+              archive=None, gate=None, solution=None, drop_report_period=10., ready=None, heartbeat=None):
+    """
+    :param camera: camera of shared_frames the planner works on
+    :param scale: view of that camera, scales other than 1 must be published by the robot side (SharedFrames views)
+    :param max_in_flight: actions queued at the robot before the planner waits, 1 plans only on a settled cube
+    :param archive: FrameArchiver kwargs for the frames kept on disk, None uses its defaults
+    :param gate: FrameGate kwargs, frames it holds back skip estimation and re-draw the last estimate
+    :param solution: face turn solution of the cube in front of the robot ("R U' F2", faces named as the cube
+        is placed), runs its cheapest primitive sequence (primitive_optimizer) instead of the planner's actions,
+        the planner then only tracks the cube
+    :param drop_report_period: seconds between reports of the frames the planner did not keep up with
+    """
     print('starting cube_planer')
     _init_rerun("solving")
-    cube_planner = CubePlanner(K=np.array([[632.11326486, 0., 316.16980761],
-                                           [0., 630.54696352, 233.72252151],
-                                           [0., 0., 1.]]),
-                               init_thread=False)
+    cube_planner = make_cube_planner(scale)
+    frame_ring = shared_frames.ring(camera, scale)
+    archiver = FrameArchiver(**(archive or {})).start()
+    gate = FrameGate(**(gate or {}))
+    prep = ImagePrep(frame_ring.shape, rotate=rotate_img)
+    plan = None
+    if solution:
+        primitives, cost = optimize(solution)
+        plan = deque(primitives)
+        print(f'solution {solution} takes {len(primitives)} primitives, about {cost:.0f} s')
+    drop_report = (time.time(), 0)  # (time of the last report, frames dropped by then)
+    was_busy = None
     executing_action = ""
     n = 0
     while True:
+        beat(heartbeat)
+        image = None
         try:
-            if busy.value:
+            for event in channel.poll_events():
+                print(f' CUBE-SOLVER action {event.action_id} (seq {event.seq}) {event.kind} {event.info}')
+            busy = len(channel.pending) >= max_in_flight
+            if busy:
                 cube_planner.action_executor.current_action = ""
+            if busy != was_busy:
+                # the robot started or finished moving the cube, estimate on the next frame in any case
+                gate.force()
+                was_busy = busy
 
-            image = cv2.cvtColor(shared_img.numpy(), cv2.COLOR_RGB2BGR)
-            print(f'processing frame {(n:=n+1)}')
-            os.makedirs("outputs", exist_ok=True)
-            cv2.imwrite(f'outputs/img_{n}_{busy.value}.png', image)
-
-            cube_planner.init_image(image, rotate_img=rotate_img)
-            cube_planner.estimate_step(busy=bool(busy.value))
-
-            if action_str:=cube_planner.action_executor.current_action:
-                executing_action = action_str
-                print(f' CUBE-SOLVER new action {executing_action}')
-                with action.get_lock():
-                    if action_str == 'flip':
-                        action.value = 1
-                    elif action_str == 'rotate_left':
-                        action.value = 2
-                    elif action_str == 'rotate_right':
-                        action.value = 3
-                    elif action_str == 'rotate_upper_left':
-                        action.value = 4
-                    elif action_str == 'rotate_upper_right':
-                        action.value = 5
-                    else:
+            frame = frame_ring.wait_latest(timeout=1.)
+            if frame is None:
+                continue
+            image = prep.prepare(frame.data.numpy())
+            if not frame_ring.is_intact(frame):
+                # the robot lapped the ring while we were converting, take the next one
+                continue
+            if time.time() - drop_report[0] > drop_report_period and frame_ring.dropped > drop_report[1]:
+                # the planner runs slower than the cameras, report the count now and then, not every frame
+                print(f'dropped {frame_ring.dropped - drop_report[1]} frames in the last '
+                      f'{time.time() - drop_report[0]:.0f} s, {frame_ring.dropped} in total')
+                drop_report = (time.time(), frame_ring.dropped)
+            if ready is not None and not ready.is_set():
+                ready.set()
+            n += 1
+            submitted = ''
+            # frames the gate holds back keep the last estimate, only the drawing below is redone
+            if gate.changed(image):
+                print(f'processing frame {n} ({gate.skipped} unchanged frames skipped so far)')
+                if (action_str := planner_step(cube_planner, image, busy)) and plan is None:
+                    if action_str not in ACTION_IDS:
                         raise Exception(f'unknown action {action_str}')
-            else:
-                with action.get_lock():
-                    action.value = 0
-            time.sleep(0.2)
-            if rotate_img:
-                image = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
-            cube_planner.plot(image,
+                    # the cube looks unchanged until the robot ran a queued action, so with max_in_flight > 1
+                    # the planner keeps proposing it, submit it once
+                    cube_planner.action_executor.current_action = ""
+                    if ACTION_IDS[action_str] not in {c.action_id for c in channel.pending.values()}:
+                        executing_action = submitted = action_str
+                        command = channel.submit(ACTION_IDS[action_str])
+                        print(f' CUBE-SOLVER new action {executing_action} (seq {command.seq})')
+            if plan and not busy:
+                executing_action = submitted = plan.popleft()
+                command = channel.submit(ACTION_IDS[executing_action])
+                print(f' CUBE-SOLVER next primitive {executing_action} (seq {command.seq}), {len(plan)} left')
+            archiver.frame(image, n, action=submitted, busy=busy)
+            canvas = prep.canvas()
+            cube_planner.plot(canvas,
                               plot_bounding_box=plot_bounding_box,
                               plot_projection=plot_projection,
                               plot_cube_state=plot_cube_state,
                               action=executing_action)
-            log_rerun_data({'solver':cv2.cvtColor(image, cv2.COLOR_BGR2RGB)}, dict())
+            log_rerun_data({'solver': prep.to_rgb(canvas)}, dict())
 
         except Exception as e:
             print(f'Got Exception {e}')
+            archiver.exception(image, n)
 
 
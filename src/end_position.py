@@ -0,0 +1,175 @@
+import json
+
+import torch
+
+ANY_TASK = '*'
+
+# hand tuned end poses, used when no library is configured
+DEFAULT_TARGETS = [
+    {'task': ANY_TASK, 'target': [0, 500., 185., 900., 870., 500.], 'weight': [0, 1, .05, .1, .8, .2]},
+    {'task': ANY_TASK, 'target': [50, 950, 50, 650, 500, 500], 'weight': [0.3, 1.0, .6, .0, .4, .5]},
+    {'task': ANY_TASK, 'target': [50, 150, 50, 650, 500, 500], 'weight': [0.3, 1.0, .6, .0, .4, .5]},
+]
+
+
+class EndPoseDetector:
+    """
+    Detects that a predicted action reached one of the end poses of a target library.
+
+    All targets are stacked into one (n_targets, n_joints) matrix, score() computes the weighted L1
+    distance to every target in one operation. Targets belong to a task or to ANY_TASK. update() adds
+    hysteresis: it only reports the end pose after hold_frames consecutive hits.
+
+    Library file (json): {"max_derivation": 70, "targets": [{"task": "Flip the Cube", "target": [...], "weight": [...]}]}
+    """
+
+    def __init__(self, targets=DEFAULT_TARGETS, max_derivation=70., hold_frames=1):
+        self.tasks = [t.get('task', ANY_TASK) for t in targets]
+        self.targets = torch.as_tensor([t['target'] for t in targets], dtype=torch.float32)
+        self.weights = torch.as_tensor([t['weight'] for t in targets], dtype=torch.float32)
+        self.max_derivation = max_derivation
+        self.hold_frames = hold_frames
+        self._masks = {}
+        self._hits = 0
+
+    @classmethod
+    def from_file(cls, path, hold_frames=1):
+        with open(path) as f:
+            library = json.load(f)
+        return cls(library['targets'], max_derivation=library.get('max_derivation', 70.), hold_frames=hold_frames)
+
+    @classmethod
+    def from_episodes(cls, dataset, weight=None, max_derivation=70., hold_frames=1, tail=1):
+        """
+        Use the last `tail` actions of every episode of a LeRobotDataset as targets of the episode's task.
+        :param weight: per joint weight, defaults to 1 for every joint
+        """
+        targets = []
+        actions = dataset.hf_dataset.select_columns(['action', 'task_index'])
+        for start, end in zip(dataset.episode_data_index['from'].tolist(), dataset.episode_data_index['to'].tolist()):
+            for idx in range(max(end - tail, start), end):
+                frame = actions[idx]
+                action = torch.as_tensor(frame['action'], dtype=torch.float32)
+                targets.append({'task': dataset.meta.tasks[int(frame['task_index'])],
+                                'target': action.tolist(),
+                                'weight': weight if weight is not None else [1.] * len(action)})
+        return cls(targets, max_derivation=max_derivation, hold_frames=hold_frames)
+
+    def save(self, path):
+        targets = [{'task': task, 'target': target, 'weight': weight}
+                   for task, target, weight in zip(self.tasks, self.targets.tolist(), self.weights.tolist())]
+        with open(path, 'w') as f:
+            json.dump({'max_derivation': self.max_derivation, 'targets': targets}, f, indent=1)
+
+    def _mask(self, task):
+        if task not in self._masks:
+            self._masks[task] = torch.as_tensor([t in (ANY_TASK, task) for t in self.tasks]) if task else None
+        return self._masks[task]
+
+    def score(self, position, task=None) -> torch.Tensor:
+        """Weighted L1 distance to every target, targets of other tasks score inf."""
+        scores = (self.weights * (torch.as_tensor(position, dtype=torch.float32) - self.targets).abs()).sum(-1)
+        mask = self._mask(task)
+        return scores if mask is None else scores.masked_fill(~mask, float('inf'))
+
+    def score_batch(self, positions, task=None) -> torch.Tensor:
+        """Lowest target score for each row of a (n_frames, n_joints) batch."""
+        positions = torch.as_tensor(positions, dtype=torch.float32)
+        scores = (self.weights * (positions[:, None] - self.targets).abs()).sum(-1)
+        mask = self._mask(task)
+        if mask is not None:
+            scores = scores.masked_fill(~mask, float('inf'))
+        return scores.min(-1).values
+
+    def is_end(self, position, task=None) -> bool:
+        return bool(self.score(position, task).min() < self.max_derivation)
+
+    def update(self, position, task=None) -> bool:
+        """is_end with hysteresis, call reset() when a new task starts."""
+        self._hits = self._hits + 1 if self.is_end(position, task) else 0
+        return self._hits >= self.hold_frames
+
+    def reset(self):
+        self._hits = 0
+
+    def explain(self, position, task=None):
+        position = torch.as_tensor(position, dtype=torch.float32)
+        for score, target, weight in zip(self.score(position, task).tolist(), self.targets, self.weights):
+            for i in range(len(target)):
+                print(f'[{i}] target {target[i]:1.1f} pos {position[i]:1.1f} '
+                      f'diff {target[i] - position[i]:1.1f} '
+                      f'diff weight {(target[i] - position[i])*weight[i]:1.1f}')
+            print(f'=> abs_derivation = {score:1.1f}')
+
+
+def first_hold(hits: torch.Tensor, hold_frames=1) -> int | None:
+    """Index of the frame at which update() would first fire for a sequence of is_end results."""
+    if hold_frames > 1:
+        if len(hits) < hold_frames:
+            return None
+        hits = hits.unfold(0, hold_frames, 1).all(-1)
+        offset = hold_frames - 1
+    else:
+        offset = 0
+    idx = hits.nonzero()
+    return int(idx[0]) + offset if len(idx) else None
+
+
+def _settle_frame(actions: torch.Tensor, settle_delta) -> int:
+    """First frame of the trailing run that stays within settle_delta of the final action on every joint."""
+    near = (actions - actions[-1]).abs().max(-1).values <= settle_delta
+    return len(actions) - int(near.flip(0).int().cumprod(0).sum())
+
+
+def evaluate_episodes(detector: EndPoseDetector, actions, episodes, fps, thresholds=None, tolerance_s=0.5,
+                      settle_delta=10.) -> dict:
+    """
+    Run the detector over recorded episodes, scoring all frames of a task in one batch.
+
+    The true end of an episode is the frame from which the recorded action stays within settle_delta of
+    its final action. A detection earlier than tolerance_s before that is a false positive (the task would
+    have been cut short), otherwise its latency is the time from the true end to the detection, i.e. task
+    time spent before the detector fires.
+
+    :param actions: (n_frames, n_joints) actions of the whole dataset
+    :param episodes: list of (start, end, task) frame ranges, end exclusive
+    :param thresholds: max_derivation values to evaluate, defaults to detector.max_derivation
+    :return: {threshold: {task: metrics}}
+    """
+    actions = torch.as_tensor(actions, dtype=torch.float32)
+    thresholds = thresholds or [detector.max_derivation]
+    tolerance = round(tolerance_s * fps)
+    by_task = {}
+    for start, end, task in episodes:
+        by_task.setdefault(task, []).append((start, end))
+
+    results = {threshold: {} for threshold in thresholds}
+    for task, ranges in by_task.items():
+        index = torch.cat([torch.arange(start, end) for start, end in ranges])
+        scores = detector.score_batch(actions[index], task).split([end - start for start, end in ranges])
+        settles = [_settle_frame(actions[start:end], settle_delta) for start, end in ranges]
+        for threshold in thresholds:
+            latencies, missed, false_positives, early_hits, early_frames = [], 0, 0, 0, 0
+            for episode_scores, settle in zip(scores, settles):
+                hits = episode_scores < threshold
+                early_hits += int(hits[:max(settle - tolerance, 0)].sum())
+                early_frames += max(settle - tolerance, 0)
+                detected = first_hold(hits, detector.hold_frames)
+                if detected is None:
+                    missed += 1
+                elif detected < settle - tolerance:
+                    false_positives += 1
+                else:
+                    latencies.append((detected - settle) / fps)
+            latencies = torch.as_tensor(latencies)
+            results[threshold][task] = {
+                'episodes': len(ranges),
+                'detected': len(latencies),
+                'missed': missed,
+                'false_positives': false_positives,
+                'false_positive_rate': false_positives / len(ranges),
+                'frame_false_positive_rate': early_hits / early_frames if early_frames else 0.,
+                'latency_mean_s': float(latencies.mean()) if len(latencies) else float('nan'),
+                'latency_p95_s': float(latencies.quantile(.95)) if len(latencies) else float('nan'),
+            }
+    return results
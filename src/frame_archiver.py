@@ -0,0 +1,133 @@
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+import cv2
+
+CODECS = ('jpg', 'png')
+# <session>_img_<n>_<busy>_<reasons>, archives written before sessions and FrameArchiver are named
+# img_<n>_<busy> with busy as 0/1
+FRAME_NAME = re.compile(r'(?:(.+)_)?img_(\d+)_(True|False|0|1)(?:_|\.|$)')
+
+
+def parse_frame_name(name):
+    """(session, frame number, busy flag) of an archived frame, None for exception frames and other files."""
+    if match := FRAME_NAME.match(name):
+        return match[1] or '', int(match[2]), match[3] in ('True', '1')
+    return None
+
+
+class FrameArchiver:
+    """
+    Writes sampled planner frames to disk on a background thread.
+
+    frame() and exception() only decide whether to keep a frame and put it into a bounded queue, when
+    the writer falls behind the frame is dropped and counted instead of blocking the caller. Frames are
+    kept every every_n frames, when the planner's action changes and when an iteration raised. The
+    directory is capped at max_bytes by deleting the oldest archived files. Kept images are copied, so
+    callers can keep reusing their buffers. File names start with the session (the start time by default)
+    because frame numbers restart with every run.
+    """
+
+    def __init__(self, directory='outputs', every_n=10, on_action_change=True, on_exception=True, codec='jpg',
+                 jpeg_quality=90, png_compression=1, max_bytes=2 ** 30, queue_size=16, session=None):
+        assert codec in CODECS, f'codec must be one of {CODECS}'
+        self.directory = directory
+        self.session = session or time.strftime('%Y%m%d-%H%M%S')
+        self.every_n = every_n
+        self.on_action_change = on_action_change
+        self.on_exception = on_exception
+        self.codec = codec
+        if codec == 'jpg':
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        else:
+            self.params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+        self.max_bytes = max_bytes
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._files = deque()  # (path, size), oldest first
+        self._bytes = 0
+        self._last_action = ''
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='frame-archiver', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def frame(self, image, n, action='', busy=False) -> bool:
+        reasons = []
+        if self.every_n and n % self.every_n == 0:
+            reasons.append('sample')
+        if self.on_action_change and action and action != self._last_action:
+            reasons.append(action)
+        self._last_action = action
+        return bool(reasons) and self._put(image, f'{self.session}_img_{n}_{busy}_{"_".join(reasons)}')
+
+    def exception(self, image, n) -> bool:
+        return self.on_exception and image is not None and self._put(image, f'{self.session}_img_{n}_exception')
+
+    def _put(self, image, name) -> bool:
+        if not self._queue.full():
+            try:
+                self._queue.put_nowait((image.copy(), name))
+                return True
+            except queue.Full:
+                pass
+        self.dropped += 1
+        return False
+
+    def _scan(self):
+        """Account for files of earlier sessions, so the cap holds across restarts."""
+        os.makedirs(self.directory, exist_ok=True)
+        entries = [e for e in os.scandir(self.directory) if e.is_file() and e.name.endswith(CODECS)]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            self._files.append((entry.path, entry.stat().st_size))
+            self._bytes += entry.stat().st_size
+
+    def _run(self):
+        self._scan()
+        while (item := self._queue.get()) is not None:
+            image, name = item
+            try:
+                ok, data = cv2.imencode(f'.{self.codec}', image, self.params)
+                if not ok:
+                    raise ValueError(f'could not encode {name}')
+                path = os.path.join(self.directory, f'{name}.{self.codec}')
+                with open(path, 'wb') as f:
+                    f.write(data)
+            except Exception as e:
+                print(f'frame archiver: {e}')
+                continue
+            self.written += 1
+            # a file of an earlier session with the same name was just overwritten, account for it once
+            for i, (old_path, size) in enumerate(self._files):
+                if old_path == path:
+                    del self._files[i]
+                    self._bytes -= size
+                    break
+            self._files.append((path, len(data)))
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old_path, size = self._files.popleft()
+                self._bytes -= size
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
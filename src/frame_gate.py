@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+
+
+class FrameGate:
+    """
+    Cheap scene change detector in front of the cube planner.
+
+    Frames are cropped to roi, shrunk to a small grayscale thumbnail and compared to the thumbnail of the
+    last frame that passed. A frame passes when the mean absolute difference exceeds threshold (0-255
+    gray levels), when max_skip frames in a row were held back, or after force().
+    """
+
+    def __init__(self, size=(32, 24), threshold=4., max_skip=15, roi=None):
+        """
+        :param size: thumbnail (width, height)
+        :param roi: (x, y, width, height) of the image region to watch, None watches the whole frame
+        """
+        self.size = size
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.roi = roi
+        self.skipped = 0
+        self.passed = 0
+        self._held = 0
+        self._reference = None
+
+    def _thumbnail(self, image):
+        if self.roi is not None:
+            x, y, w, h = self.roi
+            image = image[y:y + h, x:x + w]
+        small = cv2.resize(image, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def force(self):
+        """Let the next frame pass, e.g. after the robot moved the cube."""
+        self._reference = None
+
+    def changed(self, image) -> bool:
+        thumbnail = self._thumbnail(image)
+        if (self._reference is not None and self._held < self.max_skip
+                and np.abs(thumbnail - self._reference).mean() <= self.threshold):
+            self._held += 1
+            self.skipped += 1
+            return False
+        self._reference = thumbnail
+        self._held = 0
+        self.passed += 1
+        return True
@@ -0,0 +1,130 @@
+import time
+from dataclasses import dataclass
+
+import cv2
+import torch
+
+
+@dataclass
+class Frame:
+    data: torch.Tensor  # view into the ring slot, valid while ring.is_intact(frame)
+    number: int
+    timestamp_ns: int
+    dropped: int  # frames written since the previous read that were never returned
+
+
+class FrameRing:
+    """
+    Ring buffer of N frame slots in torch shared memory between the robot and the planner process.
+
+    The writer marks a slot incomplete, copies the frame in, stamps its frame number and time and then
+    marks it complete. Readers get a view of the newest complete slot without copying. A slot is only
+    reused after N-1 further writes, readers can check with is_intact that it was not overwritten while
+    they worked on it.
+    """
+
+    def __init__(self, shape=(480, 640, 3), n_slots=4):
+        self.shape = tuple(shape)
+        self.n_slots = n_slots
+        self.frames = torch.zeros((n_slots, *shape), dtype=torch.uint8).share_memory_()
+        self.numbers = torch.zeros(n_slots, dtype=torch.int64).share_memory_()
+        self.timestamps = torch.zeros(n_slots, dtype=torch.int64).share_memory_()
+        self.complete = torch.zeros(n_slots, dtype=torch.bool).share_memory_()
+        # [frames written, last frame number read, frames dropped by the reader]
+        self.counters = torch.zeros(3, dtype=torch.int64).share_memory_()
+        self._last_read = 0
+
+    @property
+    def written(self) -> int:
+        return int(self.counters[0])
+
+    @property
+    def dropped(self) -> int:
+        """Frames the reader never saw, visible to both processes."""
+        return int(self.counters[2])
+
+    def write(self, frame, timestamp_ns=None) -> int:
+        number = self.written + 1
+        slot = number % self.n_slots
+        self.complete[slot] = False
+        self.frames[slot].copy_(torch.as_tensor(frame))
+        self.numbers[slot] = number
+        self.timestamps[slot] = time.time_ns() if timestamp_ns is None else timestamp_ns
+        self.complete[slot] = True
+        self.counters[0] = number
+        return number
+
+    def latest(self) -> Frame | None:
+        """Newest complete frame, or None if nothing new was written since the previous call."""
+        written = self.written
+        # the newest slot may still be in progress, fall back to the ones before it
+        for number in range(written, max(written - self.n_slots, self._last_read), -1):
+            slot = number % self.n_slots
+            if bool(self.complete[slot]) and int(self.numbers[slot]) == number:
+                break
+        else:
+            return None
+
+        dropped = number - self._last_read - 1 if self._last_read else 0
+        self._last_read = number
+        self.counters[1] = number
+        self.counters[2] += dropped
+        return Frame(data=self.frames[slot], number=number,
+                     timestamp_ns=int(self.timestamps[slot]), dropped=dropped)
+
+    def wait_latest(self, timeout=None, poll=0.002) -> Frame | None:
+        start = time.perf_counter()
+        while (frame := self.latest()) is None:
+            if timeout is not None and time.perf_counter() - start > timeout:
+                return None
+            time.sleep(poll)
+        return frame
+
+    def is_intact(self, frame: Frame) -> bool:
+        slot = frame.number % self.n_slots
+        return bool(self.complete[slot]) and int(self.numbers[slot]) == frame.number
+
+
+class SharedFrames:
+    """
+    One FrameRing per configured camera, plus optional downscaled views. Views are resized once on the
+    writer side, so readers that only need a small image never touch the full resolution frame.
+
+    :param cameras: camera name -> (height, width)
+    :param views: camera name -> list of scale factors < 1 to publish next to the full resolution frame
+    """
+
+    def __init__(self, cameras: dict[str, tuple[int, int]], views: dict[str, list[float]] | None = None, n_slots=4):
+        self.rings = {(name, 1.): FrameRing((h, w, 3), n_slots) for name, (h, w) in cameras.items()}
+        for name, scales in (views or {}).items():
+            h, w = cameras[name]
+            for scale in scales:
+                self.rings[(name, scale)] = FrameRing((round(h * scale), round(w * scale), 3), n_slots)
+
+    @classmethod
+    def from_camera_configs(cls, cameras, views=None, n_slots=4, default_shape=(480, 640)):
+        """Size the rings from XArmFollowerConfig.cameras, cameras without a configured size get default_shape."""
+        shapes = {name: (cfg.height or default_shape[0], cfg.width or default_shape[1]) for name, cfg in cameras.items()}
+        return cls(shapes, views=views, n_slots=n_slots)
+
+    @property
+    def cameras(self) -> list[str]:
+        return [name for name, scale in self.rings if scale == 1.]
+
+    def ring(self, camera, scale=1.) -> FrameRing:
+        return self.rings[(camera, scale)]
+
+    def write(self, observation: dict):
+        """Publish every camera frame found in observation, with the same timestamp for all its views."""
+        timestamp_ns = time.time_ns()
+        for (name, scale), ring in self.rings.items():
+            if name not in observation:
+                continue
+            frame = observation[name]
+            if scale != 1.:
+                h, w = ring.shape[:2]
+                frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+            ring.write(frame, timestamp_ns=timestamp_ns)
+
+    def latest(self, camera, scale=1.) -> Frame | None:
+        return self.ring(camera, scale).latest()
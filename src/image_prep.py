@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+
+
+class ImagePrep:
+    """
+    Brings the RGB camera frame into the planner's orientation and channel order once per iteration.
+
+    prepare() converts RGB to BGR and rotates by 90 degrees clockwise (what CubePlanner.init_image does
+    with rotate_img=True) into preallocated buffers, so the planner gets the image with rotate_img=False
+    and the plot does not rotate again. canvas() and to_rgb() reuse buffers for drawing and for Rerun.
+    All returned arrays are overwritten by the next call, copy what has to outlive the iteration.
+    """
+
+    def __init__(self, shape=(480, 640), rotate=True):
+        h, w = shape[:2]
+        self.rotate = rotate
+        self._bgr = np.empty((h, w, 3), dtype=np.uint8)
+        out_shape = (w, h, 3) if rotate else (h, w, 3)
+        self.image = np.empty(out_shape, dtype=np.uint8)
+        self._canvas = np.empty(out_shape, dtype=np.uint8)
+        self._rgb = np.empty(out_shape, dtype=np.uint8)
+
+    def prepare(self, rgb) -> np.ndarray:
+        if not self.rotate:
+            return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=self.image)
+        cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=self._bgr)
+        return cv2.rotate(self._bgr, cv2.ROTATE_90_CLOCKWISE, dst=self.image)
+
+    def canvas(self) -> np.ndarray:
+        """Copy of the prepared image to draw on."""
+        np.copyto(self._canvas, self.image)
+        return self._canvas
+
+    def to_rgb(self, bgr) -> np.ndarray:
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=self._rgb)
@@ -1,18 +1,38 @@
-import time
 import warnings
+from dataclasses import dataclass, field
 
 import torch
 
+from action_channel import ActionChannel
 from action_controller import run_robot
 from lerobot.configs import parser
 from lerobot.record import RecordConfig
-import torch.multiprocessing as mp
 
 from cube_solver import run_planner
+from frame_ring import SharedFrames
+from supervisor import Supervisor
+
+
+@dataclass
+class SolverConfig(RecordConfig):
+    # task -> pretrained policy path, tasks without an entry use --policy.path
+    task_policies: dict[str, str] = field(default_factory=dict)
+    # policies kept in memory, least recently used ones are evicted first
+    max_policies: int | None = None
+    max_policy_memory_mb: float | None = None
+    # run inference for the next control tick while the current action is sent, actions whose observation
+    # is older than max_action_age seconds are dropped (None allows 3 control ticks)
+    pipelined: bool = False
+    max_action_age: float | None = None
+    # camera the planner works on and the scale of its view, scales below 1 are resized once by the robot process
+    planner_camera: str = 'front'
+    planner_scale: float = 1.
+    # face turn solution of the placed cube, run as optimized primitives instead of the planner's actions
+    solution: str | None = None
 
 
 @parser.wrap()
-def get_cfg(cfg: RecordConfig):
+def get_cfg(cfg: SolverConfig):
     return cfg
 
 
@@ -20,16 +40,16 @@ if __name__ == "__main__":
     warnings.filterwarnings("ignore", module="retry")
     torch.multiprocessing.set_start_method('spawn')
 
-    H, W = 480, 640
-    shared_img = torch.empty((H, W, 3), dtype=torch.uint8).share_memory_()
-    busy = mp.Value('b', False)
-    action = mp.Value('i', 0)
+    channel = ActionChannel()
 
     cfg = get_cfg()
-    p_robot = mp.Process(target=run_robot, args=(cfg, shared_img, busy, action))
-    p_robot.start()
-    time.sleep(10)
-    p_planer = mp.Process(target=run_planner, args=(shared_img, busy, action))
-    p_planer.start()
-
-    p_robot.join()
\ No newline at end of file
+    views = {cfg.planner_camera: [cfg.planner_scale]} if cfg.planner_scale != 1. else None
+    shared_frames = SharedFrames.from_camera_configs(cfg.robot.cameras, views=views, n_slots=4)
+    supervisor = Supervisor()
+    supervisor.add('robot', run_robot, args=(cfg, shared_frames, channel),
+                   kwargs=dict(task_policies=cfg.task_policies, max_policies=cfg.max_policies,
+                               max_policy_memory_mb=cfg.max_policy_memory_mb, pipelined=cfg.pipelined,
+                               max_action_age=cfg.max_action_age))
+    supervisor.add('planner', run_planner, args=(shared_frames, channel),
+                   kwargs=dict(camera=cfg.planner_camera, scale=cfg.planner_scale, solution=cfg.solution))
+    supervisor.run()
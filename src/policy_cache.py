@@ -0,0 +1,67 @@
+from collections import OrderedDict
+
+import torch
+
+
+def policy_bytes(policy: torch.nn.Module) -> int:
+    return sum(t.numel() * t.element_size() for t in (*policy.parameters(), *policy.buffers()))
+
+
+class PolicyCache:
+    """
+    Loads policies on first use and keeps them in memory, least recently used first out.
+
+    load(key) builds the policy, warm_up(policy, key) runs once right after loading so the first control
+    tick of a task does not pay lazy initialization. Eviction keeps the cache within max_policies and
+    max_bytes, but never evicts the policy that was just requested.
+    """
+
+    def __init__(self, load, warm_up=None, max_policies=None, max_bytes=None):
+        self.load = load
+        self.warm_up = warm_up
+        self.max_policies = max_policies
+        self.max_bytes = max_bytes
+        self._policies: OrderedDict = OrderedDict()
+        self._bytes = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._policies
+
+    def __len__(self):
+        return len(self._policies)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._bytes.values())
+
+    def get(self, key):
+        if key in self._policies:
+            self._policies.move_to_end(key)
+            return self._policies[key]
+
+        policy = self.load(key)
+        self.loads += 1
+        if self.warm_up is not None:
+            self.warm_up(policy, key)
+        self._policies[key] = policy
+        self._bytes[key] = policy_bytes(policy)
+        print(f'loaded policy {key} ({self._bytes[key] / 2 ** 20:.0f} MB, {len(self)} cached)')
+        self._evict()
+        return policy
+
+    def _over_limit(self):
+        return ((self.max_policies is not None and len(self._policies) > self.max_policies)
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes))
+
+    def _evict(self):
+        evicted = False
+        while len(self._policies) > 1 and self._over_limit():
+            key, _ = self._policies.popitem(last=False)
+            del self._bytes[key]
+            self.evictions += 1
+            evicted = True
+            print(f'evicted policy {key}')
+        if evicted and torch.cuda.is_available():
+            torch.cuda.empty_cache()
@@ -0,0 +1,190 @@
+"""
+Maps a face turn solution (Singmaster notation, faces named in the cube's starting orientation) onto
+the cheapest sequence of xArm primitives.
+
+The arm can only turn the top layer and reorient the whole cube. Each primitive runs the policy task of
+action_channel.action_id2task_and_time, TASK_MOVES gives what that task does, from the robot's view:
+    Flip the Cube        x   whole cube, front face to the top
+    Rotate Left Cube     y   whole cube, front face to the left
+    Rotate Right Cube    y'
+    Torn Left Top Cube   U   top layer, front row to the left
+so a face can only be turned after reorienting the cube until that face is on top. rotate_upper_right
+currently runs the left turn task too and is modelled as U, counter-clockwise turns take three left turns.
+Primitive names are the keys of action_channel.ACTION_IDS.
+
+The optimizer first merges and cancels turns of the same face (also across turns of the opposite face,
+which commute), then runs a dynamic program over the 24 cube orientations: per turn, the cheapest
+reorientation from every orientation to one with the face on top comes from all pairs shortest paths on
+the orientation graph, and turns of opposite faces are tried in both orders.
+"""
+import heapq
+import itertools
+
+from action_channel import ACTION_IDS, action_id2task_and_time
+
+# whole-cube rotation or top layer turn each robot task performs, see the module docstring
+TASK_MOVES = {
+    'Flip the Cube': 'x',
+    'Rotate Left Cube': 'y',
+    'Rotate Right Cube': "y'",
+    'Torn Left Top Cube': 'U',
+}
+CENTER_ACTION_ID = 6  # runs after every primitive
+
+PRIMITIVES = {name: TASK_MOVES[action_id2task_and_time[action_id][0]] for name, action_id in ACTION_IDS.items()}
+
+# seconds per primitive: its task runtime plus the "Move Cube to Center" that follows it
+DEFAULT_COSTS = {name: action_id2task_and_time[action_id][1] + action_id2task_and_time[CENTER_ACTION_ID][1]
+                 for name, action_id in ACTION_IDS.items()}
+
+SLOTS = ('U', 'D', 'F', 'B', 'L', 'R')
+OPPOSITE = {'U': 'D', 'D': 'U', 'F': 'B', 'B': 'F', 'L': 'R', 'R': 'L'}
+# slot the content moves into, e.g. x moves the front face to the top
+_CYCLES = {
+    'x': {'F': 'U', 'U': 'B', 'B': 'D', 'D': 'F'},
+    'y': {'F': 'L', 'L': 'B', 'B': 'R', 'R': 'F'},
+    "y'": {'F': 'R', 'R': 'B', 'B': 'L', 'L': 'F'},
+}
+
+IDENTITY = SLOTS  # orientation: the cube face in each slot of SLOTS
+
+
+def rotate(orientation, rotation):
+    """Orientation after a whole-cube rotation ('x', 'y' or "y'")."""
+    faces = dict(zip(SLOTS, orientation))
+    moved = dict(faces)
+    for src, dst in _CYCLES[rotation].items():
+        moved[dst] = faces[src]
+    return tuple(moved[slot] for slot in SLOTS)
+
+
+def parse(solution: str) -> list[tuple[str, int]]:
+    """"R U' F2" -> [('R', 1), ('U', 3), ('F', 2)], turns counted in clockwise quarter turns."""
+    moves = []
+    for token in solution.split():
+        face, suffix = token[0], token[1:]
+        if face not in OPPOSITE or suffix not in ('', "'", '2'):
+            raise ValueError(f'unsupported move {token}')
+        moves.append((face, {'': 1, "'": 3, '2': 2}[suffix]))
+    return moves
+
+
+def simplify(moves: list[tuple[str, int]]) -> list[tuple[str, int]]:
+    """Merge and cancel turns of the same face, looking past turns of the opposite face."""
+    result = []
+    for face, turns in moves:
+        for i in range(len(result) - 1, -1, -1):
+            other = result[i][0]
+            if other == face:
+                turns = (result.pop(i)[1] + turns) % 4
+                if turns:
+                    result.insert(i, (face, turns))
+                break
+            if other != OPPOSITE[face]:
+                result.append((face, turns))
+                break
+        else:
+            if turns % 4:
+                result.append((face, turns % 4))
+    return result
+
+
+def _orientations():
+    seen, todo = {IDENTITY}, [IDENTITY]
+    while todo:
+        orientation = todo.pop()
+        for rotation in _CYCLES:
+            if (nxt := rotate(orientation, rotation)) not in seen:
+                seen.add(nxt)
+                todo.append(nxt)
+    return sorted(seen)
+
+
+def _reorientations(costs):
+    """Cheapest whole-cube rotation sequence between every pair of orientations (Dijkstra from each)."""
+    rotations = {rotation: name for name, rotation in PRIMITIVES.items() if rotation in _CYCLES}
+    paths = {}
+    for start in _orientations():
+        best = {start: (0., [])}
+        queue = [(0., 0, start)]
+        counter = itertools.count(1)
+        while queue:
+            cost, _, orientation = heapq.heappop(queue)
+            if cost > best[orientation][0]:
+                continue
+            for rotation, name in rotations.items():
+                nxt = rotate(orientation, rotation)
+                new_cost = cost + costs[name]
+                if nxt not in best or new_cost < best[nxt][0]:
+                    best[nxt] = (new_cost, best[orientation][1] + [name])
+                    heapq.heappush(queue, (new_cost, next(counter), nxt))
+        paths[start] = best
+    return paths
+
+
+def _turn(turns, costs):
+    """Cheapest top layer primitives for a number of clockwise quarter turns."""
+    quarter_turns = {name: 1 if move == 'U' else 3 for name, move in sorted(PRIMITIVES.items()) if move in ('U', "U'")}
+    options = [list(names) for k in range(1, 4) for names in itertools.combinations_with_replacement(quarter_turns, k)
+               if sum(quarter_turns[n] for n in names) % 4 == turns]
+    return min(options, key=lambda names: sum(costs[n] for n in names))
+
+
+def _blocks(moves):
+    """Group consecutive turns of opposite faces, they commute and may run in either order."""
+    blocks = []
+    for move in moves:
+        if blocks and blocks[-1][-1][0] == OPPOSITE[move[0]]:
+            blocks[-1].append(move)
+        else:
+            blocks.append([move])
+    return blocks
+
+
+def optimize(solution, costs=None, start=IDENTITY):
+    """
+    :param solution: face turn solution, a string in Singmaster notation or a list of (face, quarter turns)
+    :param costs: primitive name -> cost, defaults to DEFAULT_COSTS (seconds)
+    :return: (list of primitive names, total cost)
+    """
+    costs = dict(DEFAULT_COSTS, **(costs or {}))
+    moves = simplify(parse(solution) if isinstance(solution, str) else list(solution))
+    paths = _reorientations(costs)
+
+    # orientation -> (cost, primitives so far)
+    states = {start: (0., [])}
+    for block in _blocks(moves):
+        next_states = {}
+        for order in dict.fromkeys(itertools.permutations(block)):
+            current = states
+            for face, turns in order:
+                turn = _turn(turns, costs)
+                turn_cost = sum(costs[n] for n in turn)
+                reached = {}
+                for orientation, (cost, primitives) in current.items():
+                    for target, (move_cost, rotations) in paths[orientation].items():
+                        if target[0] != face:  # face must be in the U slot
+                            continue
+                        total = cost + move_cost + turn_cost
+                        if target not in reached or total < reached[target][0]:
+                            reached[target] = (total, primitives + rotations + turn)
+                current = reached
+            for orientation, value in current.items():
+                if orientation not in next_states or value[0] < next_states[orientation][0]:
+                    next_states[orientation] = value
+        states = next_states
+
+    cost, primitives = min(states.values(), key=lambda value: value[0])
+    return primitives, cost
+
+
+def face_turns(primitives, start=IDENTITY) -> list[tuple[str, int]]:
+    """Face turns a primitive sequence performs, in the faces of the starting orientation."""
+    orientation, moves = start, []
+    for name in primitives:
+        op = PRIMITIVES[name]
+        if op in _CYCLES:
+            orientation = rotate(orientation, op)
+        else:
+            moves.append((orientation[0], 1 if op == 'U' else 3))
+    return simplify(moves)
@@ -0,0 +1,123 @@
+import time
+
+import torch.multiprocessing as mp
+
+
+def beat(heartbeat):
+    if heartbeat is not None:
+        heartbeat.value = time.time()
+
+
+class Stage:
+    def __init__(self, name, target, args=(), kwargs=None, ctx=mp):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.ctx = ctx
+        self.ready = ctx.Event()
+        self.heartbeat = ctx.Value('d', 0.)
+        self.process = None
+        self.restarts = 0
+        self.started_at = 0.
+
+    def start(self):
+        self.ready.clear()
+        self.heartbeat.value = 0.
+        self.process = self.ctx.Process(target=self.target, name=self.name, args=self.args,
+                                        kwargs=dict(self.kwargs, ready=self.ready, heartbeat=self.heartbeat))
+        self.started_at = time.time()
+        self.process.start()
+
+    def stop(self, timeout=5.):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+
+    def failure(self, heartbeat_timeout, ready_timeout):
+        """Reason the stage needs a restart, None while it is healthy."""
+        if not self.process.is_alive():
+            return f'exited with code {self.process.exitcode}'
+        now = time.time()
+        if not self.ready.is_set():
+            if now - self.started_at > ready_timeout:
+                return f'not ready after {ready_timeout:.0f} s'
+            return None
+        if now - max(self.heartbeat.value, self.started_at) > heartbeat_timeout:
+            return f'no heartbeat for {heartbeat_timeout:.0f} s'
+        return None
+
+
+class Supervisor:
+    """
+    Starts all stages at once, waits until each one signalled readiness and restarts a stage that
+    crashed, never became ready or stopped sending heartbeats, without touching the other stages.
+
+    Stage targets are called as target(*args, ready=mp.Event, heartbeat=mp.Value('d'), **kwargs) and are
+    expected to set ready once initialised and to call beat(heartbeat) regularly afterwards.
+    """
+
+    def __init__(self, heartbeat_timeout=30., ready_timeout=300., max_restarts=5, poll=0.5, ctx=mp):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.ready_timeout = ready_timeout
+        self.max_restarts = max_restarts
+        self.poll = poll
+        self.ctx = ctx
+        self.stages: dict[str, Stage] = {}
+
+    def add(self, name, target, args=(), kwargs=None):
+        self.stages[name] = Stage(name, target, args, kwargs, ctx=self.ctx)
+
+    def start(self):
+        for stage in self.stages.values():
+            stage.start()
+
+    def wait_ready(self, timeout=None, supervise=False) -> bool:
+        """
+        :param supervise: restart stages that crash or time out while the others are still initialising
+        """
+        start = time.time()
+        while not all(stage.ready.is_set() for stage in self.stages.values()):
+            if timeout is not None and time.time() - start > timeout:
+                return False
+            if supervise:
+                self.check()
+            time.sleep(self.poll)
+        print(f'all stages ready after {time.time() - start:.1f} s')
+        return True
+
+    def check(self):
+        for stage in self.stages.values():
+            reason = stage.failure(self.heartbeat_timeout, self.ready_timeout)
+            if reason is None:
+                continue
+            if stage.restarts >= self.max_restarts:
+                raise RuntimeError(f'stage {stage.name} {reason}, giving up after {stage.restarts} restarts')
+            print(f'stage {stage.name} {reason}, restarting')
+            stage.stop()
+            stage.restarts += 1
+            stage.start()
+
+    def run(self, duration=None):
+        """
+        Start all stages, wait until all of them are ready and supervise them until duration elapsed
+        (forever if None).
+        """
+        self.start()
+        end = None if duration is None else time.time() + duration
+        try:
+            self.wait_ready(None if end is None else duration, supervise=True)
+            while end is None or time.time() < end:
+                self.check()
+                time.sleep(self.poll)
+        finally:
+            self.stop()
+
+    def stop(self):
+        for stage in self.stages.values():
+            stage.stop()
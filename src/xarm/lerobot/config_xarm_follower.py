@@ -16,15 +16,33 @@ class XArmFollowerConfig(RobotConfig):
     
     # Connection settings
     port: str = "/dev/ttyUSB0"
-    connection_type: str = "serial"  # "serial", "http", "websocket"
+    connection_type: str = "serial"  # "serial", "serial_binary", "http", "websocket", "auto"
     address: str | None = None  # For HTTP/WebSocket connections
+    # "auto" probes these transports at connect and re-probes after auto_reprobe_reads consecutive reads
+    # failed or took longer than auto_reprobe_factor times the probed p95 latency
+    auto_transports: list[str] = field(default_factory=lambda: ["serial", "serial_binary", "http", "websocket"])
+    auto_probe_count: int = 20
+    auto_reprobe_reads: int = 5
+    auto_reprobe_factor: float = 3.
+    udp_sequenced: bool = False  # request ids, pipelining and retransmits for the UDP ("websocket") transport
     servo_runtime = 250
 
     # Robot configuration
     num_joints: int = 6
     pos_tol: int = 3
+    batched_write: bool = False  # send all changed joints with a single run_mult call
     max_relative_target: float | None = None
 
+    # Background bus worker owning the connection (non-blocking reads/writes)
+    threaded_bus: bool = False
+    bus_poll_hz: float = 100.
+    bus_command_queue_size: int = 8
+
+    # Bus instrumentation, export target is "rerun" or a JSON lines file path
+    bus_stats: bool = False
+    bus_stats_export: str | None = None
+    bus_stats_export_period_s: float = 5.
+
     # Serial communication settings
     baudrate: int = 115200
     max_read_size: int = 50
@@ -52,6 +70,11 @@ class XArmFollowerConfig(RobotConfig):
 
     # Camera configuration
     cameras: Dict[str, CameraConfig] = field(default_factory=dict)
+
+    # Read bus and cameras in parallel, sources older than max_observation_skew_ms are read again
+    concurrent_observation: bool = False
+    max_observation_skew_ms: float | None = None
+    max_observation_retries: int = 2
     
     # Servo runtime settings
     default_servo_runtime: int = 125
\ No newline at end of file
@@ -1,12 +1,15 @@
 import logging
+import time
 from typing import Dict
 
 from retry import retry
 
 from lerobot.errors import DeviceAlreadyConnectedError
 from ..xarm_remote.bus_servo_serial import BusServoSerial
+from ..xarm_remote.bus_servo_binary import BusServoSerialBinary
 from ..xarm_remote.bus_servo_http import BusServoHttp
 from ..xarm_remote.bus_servo_websocket import BusServoSocket
+from ..utils.bus_stats import BusStats
 from .config_xarm_follower import XArmFollowerConfig
 
 logger = logging.getLogger(__name__)
@@ -17,37 +20,156 @@ class XArmBus:
     def __init__(self, config: XArmFollowerConfig):
         self.config = config
         self.xarm = None
+        self.connection_type = None
+        self.probe_results = {}
+        self._degraded_reads = 0
+        self.reprobe_pending = False
         self._last_positions = [-10] * config.num_joints
+        self._last_read = None
+        self.stats = BusStats() if config.bus_stats else None
         
+    def _make_transport(self, connection_type):
+        if connection_type == "serial":
+            return BusServoSerial(
+                port=self.config.port,
+                remote_bus_server=self.config.remote_bus_server,
+                max_read_size=self.config.max_read_size,
+            )
+        elif connection_type == "serial_binary":
+            return BusServoSerialBinary(
+                port=self.config.port,
+                remote_bus_server=self.config.remote_bus_server,
+                max_read_size=self.config.max_read_size,
+            )
+        elif connection_type == "http":
+            if not self.config.address:
+                raise ValueError("Address required for HTTP connection")
+            return BusServoHttp(self.config.address)
+        elif connection_type == "websocket":
+            if not self.config.address:
+                raise ValueError("Address required for WebSocket connection")
+            return BusServoSocket(self.config.address, sequenced=self.config.udp_sequenced)
+        else:
+            raise ValueError(f"Unsupported connection type: {connection_type}")
+
     def connect(self):
         if self.xarm is not None:
             raise DeviceAlreadyConnectedError('device already connected')
         try:
-            if self.config.connection_type == "serial":
-                self.xarm = BusServoSerial(
-                    port=self.config.port,
-                    remote_bus_server=self.config.remote_bus_server,
-                    max_read_size=self.config.max_read_size,
-                )
-            elif self.config.connection_type == "http":
-                if not self.config.address:
-                    raise ValueError("Address required for HTTP connection")
-                self.xarm = BusServoHttp(self.config.address)
-            elif self.config.connection_type == "websocket":
-                if not self.config.address:
-                    raise ValueError("Address required for WebSocket connection")
-                self.xarm = BusServoSocket(self.config.address)
+            if self.config.connection_type == "auto":
+                self.select_transport()
             else:
-                raise ValueError(f"Unsupported connection type: {self.config.connection_type}")
-                
-            logger.info(f"Connected to xArm via {self.config.connection_type}")
+                self.connection_type = self.config.connection_type
+                self.xarm = self._make_transport(self.connection_type)
+                self.xarm.stats = self.stats
+
+            if self.stats is not None and self.config.bus_stats_export:
+                self.stats.start_export(self.config.bus_stats_export, self.config.bus_stats_export_period_s)
+            logger.info(f"Connected to xArm via {self.connection_type}")
             
         except Exception as e:
             logger.error(f"Failed to connect to xArm: {e}")
             raise
-    
+
+    def _auto_candidates(self):
+        candidates = []
+        for connection_type in self.config.auto_transports:
+            if connection_type in ("serial", "serial_binary") and not self.config.port:
+                continue
+            if connection_type == "http" and not (self.config.address or "").startswith("http"):
+                continue
+            if connection_type == "websocket" and (not self.config.address or self.config.address.startswith("http")):
+                continue
+            candidates.append(connection_type)
+        return candidates
+
+    @staticmethod
+    def probe(xarm, n=20) -> dict:
+        """Time n get_positions calls, failed calls are counted but not timed."""
+        latencies, failures = [], 0
+        for _ in range(n):
+            start = time.perf_counter()
+            try:
+                xarm.get_positions()
+            except Exception:
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        if len(latencies) < n / 2:
+            return {'p95_ms': float('inf'), 'mean_ms': float('inf'), 'failures': failures}
+        latencies.sort()
+        return {'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1e3,
+                'mean_ms': sum(latencies) / len(latencies) * 1e3,
+                'failures': failures}
+
+    def select_transport(self):
+        """
+        Probe every configured transport with a short burst of position reads and connect with the one
+        with the best p95 latency. Results are kept in self.probe_results.
+        """
+        self.probe_results = {}
+        for connection_type in self._auto_candidates():
+            try:
+                xarm = self._make_transport(connection_type)
+            except Exception as e:
+                logger.info(f"auto: {connection_type} unavailable: {e}")
+                continue
+            try:
+                self.probe_results[connection_type] = self.probe(xarm, self.config.auto_probe_count)
+            finally:
+                # transports sharing the serial port must release it before the next probe
+                xarm.close()
+            logger.info(f"auto: {connection_type} {self.probe_results[connection_type]}")
+
+        usable = {k: v for k, v in self.probe_results.items() if v['p95_ms'] != float('inf')}
+        if not usable:
+            raise ConnectionError(f"no usable xArm transport, probed {self.probe_results}")
+        self.connection_type = min(usable, key=lambda k: usable[k]['p95_ms'])
+        self.xarm = self._make_transport(self.connection_type)
+        self.xarm.stats = self.stats
+        self._degraded_reads = 0
+
+    def _check_degraded(self, latency_s):
+        """
+        Count reads that failed or took far longer than probed. Once too many in a row, flag a re-probe for
+        the caller to run with reprobe() when the arm is idle, probing here would stall the read loop.
+        """
+        if latency_s is not None and latency_s * 1e3 <= self.config.auto_reprobe_factor * \
+                self.probe_results[self.connection_type]['p95_ms']:
+            self._degraded_reads = 0
+            return
+        self._degraded_reads += 1
+        if self._degraded_reads >= self.config.auto_reprobe_reads and not self.reprobe_pending:
+            logger.warning(f"xArm link via {self.connection_type} degraded, re-probe pending")
+            self.reprobe_pending = True
+
+    def reprobe(self) -> bool:
+        """
+        Re-run the transport selection after the link degraded. The current transport is kept when no
+        candidate turns out usable.
+        :return: True if the connection switched to another transport
+        """
+        self.reprobe_pending = False
+        self._degraded_reads = 0
+        previous = self.connection_type
+        # transports sharing the serial port can only be probed with the current one closed
+        self.xarm.close()
+        try:
+            self.select_transport()
+        except Exception as e:
+            logger.warning(f"re-probe found no better xArm transport, staying on {previous}: {e}")
+            self.connection_type = previous
+            self.xarm = self._make_transport(previous)
+            self.xarm.stats = self.stats
+        return self.connection_type != previous
+
     def disconnect(self):
-        pass
+        if self.stats is not None:
+            self.stats.stop_export()
+        if self.xarm is not None:
+            # the binary transport has to hand the board back to its REPL
+            self.xarm.close()
+            self.xarm = None
 
     def is_connected(self) -> bool:
         """Check if robot is connected."""
@@ -69,20 +191,68 @@ class XArmBus:
         for id in motor_ids:
             self.xarm.unload(id)
 
-    @retry( tries=10, delay=0.03)
-    def read_positions(self) -> Dict[str, float]:
-        positions = self.xarm.get_positions()
+    def _read_positions_once(self, timeout=None) -> Dict[str, float]:
+        auto = self.config.connection_type == "auto"
+        start = time.perf_counter()
+        try:
+            positions = self.xarm.get_positions(timeout=timeout)
+        except Exception:
+            if self.stats is not None:
+                self.stats.count('read_positions', 'retries')
+            if auto:
+                self._check_degraded(None)
+            raise
+        if auto:
+            self._check_degraded(time.perf_counter() - start)
         self._last_positions = positions
         joint_positions= {self.config.motorid2name[i+1]: float(pos)
                           for i, pos in enumerate(positions)}
+        self._last_read = joint_positions
         return joint_positions
 
+    @retry( tries=10, delay=0.03)
+    def read_positions(self) -> Dict[str, float]:
+        return self._read_positions_once()
+
+    def read_positions_within(self, budget_s: float, delay=0.005) -> tuple[Dict[str, float], bool]:
+        """
+        Retry position reads only while budget_s of the caller's tick is left. When the budget runs out
+        the last successfully read positions are returned flagged as stale instead of blocking further.
+        :return: joint positions, stale flag
+        """
+        deadline = time.perf_counter() + budget_s
+        while True:
+            try:
+                # cap the transport's own timeout too, one slow reply must not outlast the budget
+                return self._read_positions_once(timeout=max(deadline - time.perf_counter(), 1e-3)), False
+            except Exception as e:
+                error = e
+            if time.perf_counter() + delay >= deadline:
+                break
+            time.sleep(delay)
+
+        if self._last_read is None:
+            raise TimeoutError(f'no positions read within {budget_s * 1e3:.1f} ms') from error
+        logger.debug(f'position read missed its {budget_s * 1e3:.1f} ms budget, returning stale positions')
+        return dict(self._last_read), True
+
     def write_positions(self, positions: Dict[str, float], servo_runtime: int | None = None, pos_tol=0):
+        changed = []
         for joint in positions:
             pos = positions[joint]
             motor_id = self.config.joint2motorid[joint]
             limits = self.config.joint_limits[joint]
             pos = int(max(limits["min"], min(limits["max"], pos)))
             if abs(self._last_positions[motor_id-1] - pos) > pos_tol:
+                changed.append([motor_id, pos])
+
+        if not changed:
+            return
+        if self.config.batched_write and len(changed) > 1:
+            # one bus transaction for all changed joints instead of one round trip per joint
+            self.xarm.run_mult(changed, servo_runtime)
+        else:
+            for motor_id, pos in changed:
                 self.xarm.run(motor_id, pos, servo_runtime)
-                self._last_positions[motor_id-1] = pos
\ No newline at end of file
+        for motor_id, pos in changed:
+            self._last_positions[motor_id-1] = pos
\ No newline at end of file
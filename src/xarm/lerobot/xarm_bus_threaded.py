@@ -0,0 +1,139 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict
+
+from .config_xarm_follower import XArmFollowerConfig
+from .xarm_bus import XArmBus
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadedXArmBus(XArmBus):
+    """
+    XArmBus whose connection is owned by a background worker thread.
+
+    The worker polls positions at config.bus_poll_hz into a lock-protected cache and drains a bounded
+    queue of outgoing commands between reads. read_positions and write_positions never touch the bus
+    themselves, so the caller's loop does not depend on serial jitter or read retries. Reads go through
+    _read_positions_once, so bus stats and the "auto" degradation check see them, a re-probe runs on the
+    worker as well.
+    """
+
+    def __init__(self, config: XArmFollowerConfig):
+        super().__init__(config)
+        self._lock = threading.Lock()
+        self._positions = None
+        self._positions_t = 0.
+        self._commands = queue.Queue(maxsize=config.bus_command_queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def connect(self, timeout=2.):
+        super().connect()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='xarm-bus', daemon=True)
+        self._thread.start()
+
+        start = time.perf_counter()
+        while self._positions is None:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f'no positions read from xArm within {timeout:.1f} s')
+            time.sleep(0.005)
+
+    def disconnect(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        super().disconnect()
+
+    def is_connected(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and self._positions is not None
+
+    def _submit(self, fn, *args, position_write=False):
+        command = (fn, args, position_write)
+        try:
+            self._commands.put_nowait(command)
+            return
+        except queue.Full:
+            pass
+        if position_write:
+            # the worker fell behind, a newer position target supersedes the oldest queued one
+            with self._commands.mutex:
+                pending = self._commands.queue
+                for i, (_, _, queued_write) in enumerate(pending):
+                    if queued_write:
+                        del pending[i]
+                        pending.append(command)
+                        logger.warning('xArm command queue full, dropped oldest position write')
+                        return
+        # torque changes are never dropped, wait for the worker to make room
+        self._commands.put(command)
+
+    def _drain_commands(self):
+        while True:
+            try:
+                fn, args, _ = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.warning(f'xArm command {fn.__name__} failed: {e}')
+
+    def _run(self):
+        period = 1 / self.config.bus_poll_hz
+        while not self._stop_event.is_set():
+            start = time.perf_counter()
+            self._drain_commands()
+            try:
+                positions = self._read_positions_once()
+            except Exception as e:
+                logger.debug(f'xArm position read failed: {e}')
+            else:
+                with self._lock:
+                    self._positions = positions
+                    self._positions_t = time.perf_counter()
+            remaining = period - (time.perf_counter() - start)
+            if remaining > 0:
+                self._stop_event.wait(remaining)
+        self._drain_commands()
+
+    def read_positions_timestamped(self) -> tuple[Dict[str, float], float]:
+        with self._lock:
+            positions, t = self._positions, self._positions_t
+        return dict(positions), t
+
+    def read_positions(self) -> Dict[str, float]:
+        return self.read_positions_timestamped()[0]
+
+    def read_positions_within(self, budget_s: float, delay=0.) -> tuple[Dict[str, float], bool]:
+        # never blocks, the cache counts as stale once the worker missed two polls
+        positions, t = self.read_positions_timestamped()
+        return positions, time.perf_counter() - t > 2 / self.config.bus_poll_hz
+
+    def write_positions(self, positions: Dict[str, float], servo_runtime: int | None = None, pos_tol=0):
+        self._submit(super().write_positions, dict(positions), servo_runtime, pos_tol, position_write=True)
+
+    def enable_torque(self):
+        self._submit(super().enable_torque)
+
+    def disable_torque(self):
+        self._submit(super().disable_torque)
+
+    def reprobe(self) -> bool:
+        if self._thread is None:
+            return super().reprobe()
+        # the worker owns the transport, probe between its reads and wait for the outcome
+        result = queue.Queue(maxsize=1)
+
+        def run():
+            try:
+                result.put(super(ThreadedXArmBus, self).reprobe())
+            except Exception:
+                result.put(False)
+                raise
+        self._submit(run)
+        return result.get()
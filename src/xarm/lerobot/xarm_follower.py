@@ -1,5 +1,6 @@
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 from functools import cached_property
 
@@ -11,6 +12,7 @@ from lerobot.robots.utils import ensure_safe_goal_position
 
 from .config_xarm_follower import XArmFollowerConfig
 from .xarm_bus import XArmBus
+from .xarm_bus_threaded import ThreadedXArmBus
 
 logger = logging.getLogger(__name__)
 
@@ -23,9 +25,12 @@ class XArmFollower(Robot):
     def __init__(self, config: XArmFollowerConfig):
         super().__init__(config)
         self.config = config
-        self.bus = XArmBus(config)
+        self.bus = ThreadedXArmBus(config) if config.threaded_bus else XArmBus(config)
         self.cameras = make_cameras_from_configs(config.cameras)
         self._is_connected = False
+        self.positions_stale = False
+        self.observation_timestamps = {}
+        self._executor = None
         logger.info(f"Initialized xArm robot with {config.num_joints} joints")
 
     @property
@@ -97,21 +102,81 @@ class XArmFollower(Robot):
     def configure(self) -> None:
         self.bus.enable_torque()
     
-    def get_observation(self) -> dict[str, Any]:
+    def _read_state(self, budget_s: float | None = None) -> tuple[dict[str, float], float]:
+        # stamped when the read starts, the time it takes to answer says nothing about when it was sampled
+        t = time.perf_counter()
+        if budget_s is None:
+            positions = self.bus.read_positions()
+            self.positions_stale = False
+        else:
+            positions, self.positions_stale = self.bus.read_positions_within(budget_s)
+        if isinstance(self.bus, ThreadedXArmBus) and not self.positions_stale:
+            # the cache knows when the positions were actually read
+            t = self.bus.read_positions_timestamped()[1]
+        return {f"{motor}.pos": val for motor, val in positions.items()}, t
+
+    def _read_camera(self, cam_key) -> tuple[Any, float]:
+        t = time.perf_counter()
+        return self.cameras[cam_key].async_read(), t
+
+    def get_observation(self, budget_s: float | None = None) -> dict[str, Any]:
+        """
+        :param budget_s: time left for the position read, when set a failing read returns the last
+            known positions and sets self.positions_stale instead of retrying on
+        """
+        if self.config.concurrent_observation:
+            return self._get_observation_concurrent(budget_s)
+
         start = time.perf_counter()
-        obs_dict = self.bus.read_positions()
-        obs_dict = {f"{motor}.pos": val for motor, val in obs_dict.items()}
+        obs_dict, t_state = self._read_state(budget_s)
+        self.observation_timestamps = {"state": t_state}
         dt_ms = (time.perf_counter() - start) * 1e3
         logger.debug(f"{self} read state: {dt_ms:.1f}ms")
 
         # Capture images from cameras
         for cam_key, cam in self.cameras.items():
             start = time.perf_counter()
-            obs_dict[cam_key] = cam.async_read()
+            obs_dict[cam_key], self.observation_timestamps[cam_key] = self._read_camera(cam_key)
             dt_ms = (time.perf_counter() - start) * 1e3
             logger.debug(f"{self} read {cam_key}: {dt_ms:.1f}ms")
 
         return obs_dict
+
+    def _get_observation_concurrent(self, budget_s: float | None = None) -> dict[str, Any]:
+        """
+        Read the bus and all cameras at the same time. Sources whose sample is more than
+        config.max_observation_skew_ms older than the newest one are read again, only those, at most
+        config.max_observation_retries times. Samples are stamped when their read starts (the bus cache
+        time for the threaded bus), these capture times end up in self.observation_timestamps.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1 + len(self.cameras), thread_name_prefix="xarm-obs")
+
+        def submit(source):
+            if source == "state":
+                return self._executor.submit(self._read_state, budget_s)
+            return self._executor.submit(self._read_camera, source)
+
+        start = time.perf_counter()
+        samples = {source: future.result() for source, future in
+                   {source: submit(source) for source in ["state", *self.cameras]}.items()}
+
+        max_skew = self.config.max_observation_skew_ms
+        for _ in range(self.config.max_observation_retries if max_skew is not None else 0):
+            newest = max(t for _, t in samples.values())
+            stale = [source for source, (_, t) in samples.items() if (newest - t) * 1e3 > max_skew]
+            if not stale:
+                break
+            samples.update({source: future.result() for source, future in
+                            {source: submit(source) for source in stale}.items()})
+
+        self.observation_timestamps = {source: t for source, (_, t) in samples.items()}
+        state, _ = samples.pop("state")
+        obs_dict = {**state, **{cam_key: frame for cam_key, (frame, _) in samples.items()}}
+        dt_ms = (time.perf_counter() - start) * 1e3
+        skew_ms = (max(self.observation_timestamps.values()) - min(self.observation_timestamps.values())) * 1e3
+        logger.debug(f"{self} read observation: {dt_ms:.1f}ms skew {skew_ms:.1f}ms")
+        return obs_dict
     
     def send_action(self, action: dict[str, Any], servo_runtime=None) -> dict[str, Any]:
         goal_pos = {key.removesuffix(".pos"): val for key, val in action.items() if key.endswith(".pos")}
@@ -128,6 +193,9 @@ class XArmFollower(Robot):
     
     def move_to_default_position(self, task: str = "") -> None:
         """Move robot to task-specific default position."""
+        if self.bus.reprobe_pending:
+            # between tasks the arm is idle, the only time a transport re-probe may block the bus
+            self.bus.reprobe()
         # Task-specific positions: [gripper, joint_1, joint_2, joint_3, joint_4, joint_5]
         if 'flip' in task.lower() or 'move cube to center' in task.lower():
             joint_pos = [600, 500, 125, 500, 500, 500]
@@ -145,6 +213,9 @@ class XArmFollower(Robot):
         logger.info(f"Moved to default position for task: {task or 'default'}")
 
     def disconnect(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
         self.bus.disconnect()
         for cam in self.cameras.values():
             cam.disconnect()
@@ -0,0 +1,115 @@
+import bisect
+import json
+import threading
+import time
+
+# upper bucket edges of the latency histograms, the last bucket collects everything above
+LATENCY_BUCKETS_MS = (0.5, 1., 2., 5., 10., 20., 33., 50., 100., 200., 500.)
+COUNTERS = ('timeouts', 'retries', 'parse_failures', 'errors')
+
+
+class CommandStats:
+    def __init__(self):
+        self.n = 0
+        self.total_s = 0.
+        self.max_s = 0.
+        self.sent = 0
+        self.received = 0
+        self.hist = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def percentile_ms(self, q):
+        if not self.n:
+            return 0.
+        rank, seen = q * self.n, 0
+        for i, count in enumerate(self.hist):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_s * 1e3
+        return self.max_s * 1e3
+
+    def as_dict(self):
+        return {
+            'n': self.n,
+            'mean_ms': self.total_s / self.n * 1e3 if self.n else 0.,
+            'max_ms': self.max_s * 1e3,
+            'p50_ms': self.percentile_ms(.5),
+            'p95_ms': self.percentile_ms(.95),
+            'p99_ms': self.percentile_ms(.99),
+            'bytes_sent': self.sent,
+            'bytes_received': self.received,
+            'hist': list(self.hist),
+            **self.counters,
+        }
+
+
+class BusStats:
+    """
+    Per-command latency histograms and counters for the bus layer.
+
+    Transports keep stats = None unless one is attached, so the hot path only pays an `is None` check
+    when instrumentation is disabled. Percentiles are bucket upper edges of LATENCY_BUCKETS_MS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._commands: dict[str, CommandStats] = {}
+        self._export_thread = None
+        self._export_stop = threading.Event()
+
+    def _get(self, command) -> CommandStats:
+        stats = self._commands.get(command)
+        if stats is None:
+            stats = self._commands[command] = CommandStats()
+        return stats
+
+    def record(self, command, latency_s, sent=0, received=0):
+        bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, latency_s * 1e3)
+        with self._lock:
+            stats = self._get(command)
+            stats.n += 1
+            stats.total_s += latency_s
+            stats.max_s = max(stats.max_s, latency_s)
+            stats.sent += sent
+            stats.received += received
+            stats.hist[bucket] += 1
+
+    def count(self, command, counter, n=1):
+        with self._lock:
+            self._get(command).counters[counter] += n
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {command: stats.as_dict() for command, stats in self._commands.items()}
+
+    def reset(self):
+        with self._lock:
+            self._commands.clear()
+
+    def export_file(self, path):
+        with open(path, 'a') as f:
+            f.write(json.dumps({'time': time.time(), 'commands': self.snapshot()}) + '\n')
+
+    def export_rerun(self, prefix='bus'):
+        import rerun as rr
+        for command, stats in self.snapshot().items():
+            for key in ('mean_ms', 'p95_ms', 'max_ms', *COUNTERS):
+                rr.log(f'{prefix}/{command}/{key}', rr.Scalar(stats[key]))
+
+    def start_export(self, target, period_s=5.):
+        """Export a snapshot every period_s seconds, target is 'rerun' or a path of a JSON lines file."""
+        export = self.export_rerun if target == 'rerun' else (lambda: self.export_file(target))
+
+        def run():
+            while not self._export_stop.wait(period_s):
+                export()
+
+        self._export_stop.clear()
+        self._export_thread = threading.Thread(target=run, name='bus-stats-export', daemon=True)
+        self._export_thread.start()
+
+    def stop_export(self):
+        self._export_stop.set()
+        if self._export_thread is not None:
+            self._export_thread.join()
+            self._export_thread = None
@@ -0,0 +1,83 @@
+import collections
+import time
+
+
+class RateScheduler:
+    """
+    Runs a loop at a fixed rate against absolute deadlines start + k / fps, so a slow tick does not shift
+    all later ones. sleep() sleeps until spin_s before the deadline and spins the rest, which keeps the
+    wake-up accurate without burning a core for the whole tick.
+
+    A tick that ends after its deadline counts as an overrun. When the loop is behind by more than
+    max_lag_ticks the missed deadlines are skipped instead of running a burst of back to back ticks.
+
+        rate = RateScheduler(fps)
+        while rate.elapsed < duration:
+            ...
+            rate.sleep()
+        print(rate.summary())
+
+    clock and sleep default to time.perf_counter and time.sleep, tests pass a fake clock.
+    """
+
+    def __init__(self, fps, spin_s=0.002, max_lag_ticks=1, history=1000, clock=time.perf_counter,
+                 sleep=time.sleep):
+        self.period = 1 / fps
+        self.clock = clock
+        self._sleep = sleep
+        self.spin_s = spin_s
+        self.max_lag_ticks = max_lag_ticks
+        self.jitter = collections.deque(maxlen=history)  # wake-up lateness in seconds
+        self.start()
+
+    def start(self):
+        self._start = self.clock()
+        self._next = self._start + self.period
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.jitter.clear()
+
+    @property
+    def elapsed(self) -> float:
+        return self.clock() - self._start
+
+    def sleep(self) -> float:
+        """Wait for the next deadline, returns how late this tick's work finished (0 when on time)."""
+        now = self.clock()
+        self.ticks += 1
+        late = now - self._next
+        if late > 0:
+            self.overruns += 1
+            missed = int(late / self.period)
+            if missed >= self.max_lag_ticks:
+                self.skipped += missed
+                self._next += missed * self.period
+            self._next += self.period
+            return late
+
+        if self._next - now > self.spin_s:
+            self._sleep(self._next - now - self.spin_s)
+        while (now := self.clock()) < self._next:
+            pass
+        self.jitter.append(now - self._next)
+        self._next += self.period
+        return 0.
+
+    def stats(self) -> dict:
+        jitter = sorted(self.jitter)
+        return {
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'rate_hz': self.ticks / self.elapsed if self.ticks else 0.,
+            'jitter_mean_ms': sum(jitter) / len(jitter) * 1e3 if jitter else 0.,
+            'jitter_p99_ms': jitter[int(.99 * (len(jitter) - 1))] * 1e3 if jitter else 0.,
+            'jitter_max_ms': jitter[-1] * 1e3 if jitter else 0.,
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (f"{s['ticks']} ticks at {s['rate_hz']:.1f} Hz (target {1 / self.period:.1f} Hz), "
+                f"{s['overruns']} overruns, {s['skipped']} skipped, "
+                f"jitter mean {s['jitter_mean_ms']:.2f} ms p99 {s['jitter_p99_ms']:.2f} ms max {s['jitter_max_ms']:.2f} ms")
@@ -0,0 +1,283 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from urllib.parse import quote, urlsplit
+
+import serial
+
+from .bus_servo_serial import CTRL_A, CTRL_B, CTRL_C, CTRL_D
+
+
+class AsyncBusServoBase(ABC):
+    """
+    Method surface shared by the asyncio transports, mirrors BusServoHttp with awaitable methods.
+    Subclasses implement connect, close and run_command(command, params).
+    """
+
+    @abstractmethod
+    async def connect(self):
+        ...
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+    @abstractmethod
+    async def run_command(self, command, params):
+        ...
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def run(self, id, p, servo_run_time=1000):
+        return await self.run_command('run', [id, p, servo_run_time])
+
+    async def run_mult(self, pp, servo_run_time):
+        return await self.run_command('run_mult', [pp, servo_run_time])
+
+    async def run_add_or_dec(self, id, speed):
+        return await self.run_command('run_add_or_dec', [id, speed])
+
+    async def stop(self, id):
+        return await self.run_command('stop', [id])
+
+    async def set_ID(self, old_id, new_id):
+        return await self.run_command('set_ID', [old_id, new_id])
+
+    async def get_ID(self, id):
+        return await self.run_command('get_ID', [id])
+
+    async def set_mode(self, id, mode, speed=0):
+        return await self.run_command('set_mode', [id, mode, speed])
+
+    async def load(self, id):
+        return await self.run_command('load', [id])
+
+    async def unload(self, id):
+        return await self.run_command('unload', [id])
+
+    async def servo_receive_handle(self):
+        return await self.run_command('servo_receive_handle', [])
+
+    async def get_position(self, id):
+        return int(await self.run_command('get_position', [id]))
+
+    async def get_positions(self):
+        pos_string = await self.run_command('get_positions', [])
+        if isinstance(pos_string, list):
+            return pos_string
+        try:
+            return json.loads(pos_string)
+        except (TypeError, json.JSONDecodeError):
+            raise Exception(f'Could not get position from string {pos_string}')
+
+    async def set_positions(self, goal_positions, servo_run_time):
+        assert len(goal_positions) == 6
+        await self.run_command('set_positions', [*goal_positions, servo_run_time])
+
+    async def get_vin(self, id):
+        return await self.run_command('get_vin', [id])
+
+    async def adjust_offset(self, id, offset):
+        return await self.run_command('adjust_offset', [id, offset])
+
+    async def save_offset(self, id):
+        return await self.run_command('save_offset', [id])
+
+    async def get_offset(self, id):
+        return await self.run_command('get_offset', [id])
+
+
+class AsyncBusServoSerial(AsyncBusServoBase):
+    """Raw-REPL serial transport driven by loop.add_reader on the non-blocking port descriptor."""
+
+    def __init__(self, port='/dev/ttyUSB0',
+                       remote_bus_server='bus_servo',
+                       baudrate=115200,
+                       timeout=0.2):
+        self.port = port
+        self.remote_bus_server = remote_bus_server
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.con = None
+        self._buf = bytearray()
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        self.con = serial.Serial(self.port, baudrate=self.baudrate, timeout=0)
+        for ctrl in (CTRL_B, CTRL_C, CTRL_C, CTRL_A):
+            self.con.write(ctrl)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        self.con.reset_input_buffer()
+        self._buf.clear()
+
+    async def close(self):
+        if self.con is not None:
+            self.con.close()
+            self.con = None
+
+    async def _wait_readable(self, timeout):
+        loop = asyncio.get_running_loop()
+        fd = self.con.fileno()
+        readable = loop.create_future()
+
+        def on_readable():
+            if not readable.done():
+                readable.set_result(None)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            await asyncio.wait_for(readable, timeout)
+        finally:
+            loop.remove_reader(fd)
+
+    async def _read_until(self, marker: bytes, timeout=None) -> bytes:
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = loop.time() + timeout
+        while marker not in self._buf:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f'{marker} not seen within {timeout:.1f} s')
+            try:
+                await self._wait_readable(remaining)
+            except asyncio.TimeoutError:
+                continue
+            self._buf.extend(self.con.read(self.con.in_waiting or 1))
+        end = self._buf.index(marker) + len(marker)
+        res = bytes(self._buf[:end])
+        del self._buf[:end]
+        return res
+
+    async def run_command(self, command, params):
+        call = f'{command}({", ".join(map(str, params))})'
+        async with self._lock:
+            self._buf.clear()
+            self.con.reset_input_buffer()
+            self.con.write(f'print({self.remote_bus_server}.{call})\n'.encode() + CTRL_D)
+            res = await self._read_until(b'>')
+        return res[res.find(b'OK')+2:res.find(b'\r')].decode()
+
+    async def set_positions(self, goal_positions, servo_run_time):
+        assert len(goal_positions) == 6
+        await self.run_command('set_positions', [goal_positions, servo_run_time])
+
+
+class AsyncBusServoHttp(AsyncBusServoBase):
+    """HTTP/1.1 keep-alive transport on asyncio streams, speaks the same /command endpoint as BusServoHttp."""
+
+    def __init__(self, address, timeout=1.):
+        self.address = address
+        url = urlsplit(address)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._reader, self._writer = None, None
+
+    async def _request(self, path):
+        request = (f'GET {path} HTTP/1.1\r\n'
+                   f'Host: {self.host}\r\n'
+                   f'Connection: keep-alive\r\n\r\n')
+        self._writer.write(request.encode())
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed by server')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self._reader.readline()) not in (b'\r\n', b'\n', b''):
+            key, _, value = line.decode().partition(':')
+            headers[key.strip().lower()] = value.strip()
+        body = await self._reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        if status >= 400:
+            raise ConnectionError(f'HTTP {status}: {body.decode(errors="ignore")}')
+        if headers.get('content-type') == 'application/json':
+            return json.loads(body)
+        return body.decode()
+
+    async def run_command(self, command, params):
+        if params:
+            path = f"/command?method={command}&params={quote(','.join(map(str, params)))}"
+        else:
+            path = f"/command?method={command}"
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        await self.connect()
+                    return await asyncio.wait_for(self._request(path), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    # stale keep-alive connection, reconnect once
+                    await self.close()
+                    if attempt:
+                        raise
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.responses = asyncio.Queue()
+
+    def datagram_received(self, data, addr):
+        self.responses.put_nowait(data)
+
+    def error_received(self, exc):
+        self.responses.put_nowait(exc)
+
+
+class AsyncBusServoSocket(AsyncBusServoBase):
+    """UDP transport on a datagram endpoint, speaks the same command-params datagrams as BusServoSocket."""
+
+    def __init__(self, host_ip, port=5005, timeout=5):
+        self.host_ip = host_ip
+        self.port = port
+        self.timeout = timeout
+        self._transport = None
+        self._protocol = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        self._transport, self._protocol = await loop.create_datagram_endpoint(
+            _DatagramProtocol, remote_addr=(self.host_ip, self.port))
+
+    async def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    async def run_command(self, command, params):
+        if params:
+            data = f"{command}-{','.join(map(str, params))}"
+        else:
+            data = f"{command}"
+        async with self._lock:
+            while not self._protocol.responses.empty():
+                self._protocol.responses.get_nowait()
+            self._transport.sendto(data.encode())
+            response = await asyncio.wait_for(self._protocol.responses.get(), self.timeout)
+        if isinstance(response, Exception):
+            raise response
+        return response.decode()
@@ -0,0 +1,222 @@
+import struct
+import time
+
+from .bus_servo_serial import BusServoSerial, CTRL_D
+
+# Frame layout (both directions):
+#   header (1 byte) | command id (u8) | payload length (u8) | payload | checksum (u8)
+# checksum = (command id + payload length + sum(payload)) & 0xFF, positions are little-endian int16.
+REQUEST_HEADER, RESPONSE_HEADER = 0xA5, 0x5A
+
+CMD_GET_POSITIONS = 0x01
+CMD_GET_POSITION = 0x02
+CMD_RUN = 0x03
+CMD_RUN_MULT = 0x04
+CMD_SET_POSITIONS = 0x05
+CMD_LOAD = 0x06
+CMD_UNLOAD = 0x07
+CMD_EVAL = 0x10
+CMD_EXIT = 0x7F
+CMD_ERROR = 0xFF
+
+COMMAND_NAMES = {CMD_GET_POSITIONS: 'get_positions', CMD_GET_POSITION: 'get_position', CMD_RUN: 'run',
+                 CMD_RUN_MULT: 'run_mult', CMD_SET_POSITIONS: 'set_positions', CMD_LOAD: 'load',
+                 CMD_UNLOAD: 'unload', CMD_EVAL: 'eval', CMD_EXIT: 'exit'}
+
+# MicroPython helper uploaded to the board on connect. It serves binary frames on stdin/stdout
+# until CMD_EXIT is received and then drops back to the raw REPL.
+BOARD_HELPER = """
+import sys, struct, json, micropython
+def _xb_serve(bs):
+    rd = sys.stdin.buffer.read
+    wr = sys.stdout.buffer.write
+    micropython.kbd_intr(-1)
+    try:
+        while True:
+            if rd(1) != b'\\xa5':
+                continue
+            cmd, n = rd(2)
+            p = rd(n) if n else b''
+            if rd(1)[0] != (cmd + n + sum(p)) & 0xFF:
+                cmd, out = 0xFF, b'checksum'
+            else:
+                try:
+                    out = b''
+                    if cmd == 0x01:
+                        v = bs.get_positions()
+                        if isinstance(v, str):
+                            v = json.loads(v)
+                        out = struct.pack('<6h', *v)
+                    elif cmd == 0x02:
+                        out = struct.pack('<h', int(bs.get_position(p[0])))
+                    elif cmd == 0x03:
+                        i, pos, t = struct.unpack('<BhH', p)
+                        bs.run(i, pos, t)
+                    elif cmd == 0x04:
+                        t = struct.unpack('<H', p[:2])[0]
+                        bs.run_mult([list(struct.unpack('<Bh', p[k:k + 3])) for k in range(2, n, 3)], t)
+                    elif cmd == 0x05:
+                        v = struct.unpack('<6hH', p)
+                        bs.set_positions(list(v[:6]), v[6])
+                    elif cmd == 0x06:
+                        bs.load(p[0])
+                    elif cmd == 0x07:
+                        bs.unload(p[0])
+                    elif cmd == 0x10:
+                        out = str(eval('bs.' + p.decode(), {'bs': bs})).encode()[:255]
+                    elif cmd == 0x7F:
+                        pass
+                    else:
+                        cmd, out = 0xFF, b'unknown command'
+                except Exception as e:
+                    cmd, out = 0xFF, str(e).encode()[:255]
+            wr(b'\\x5a' + bytes((cmd, len(out))) + out + bytes(((cmd + len(out) + sum(out)) & 0xFF,)))
+            if cmd == 0x7F:
+                return
+    finally:
+        micropython.kbd_intr(3)
+"""
+
+
+def encode_frame(header, cmd, payload=b''):
+    if len(payload) > 255:
+        raise ValueError(f'payload too long ({len(payload)} bytes)')
+    checksum = (cmd + len(payload) + sum(payload)) & 0xFF
+    return bytes((header, cmd, len(payload))) + payload + bytes((checksum,))
+
+
+class BusServoSerialBinary(BusServoSerial):
+    """
+    BusServoSerial speaking a framed binary protocol instead of eval'd print() over the raw REPL.
+    The board helper is uploaded once on connect, position reads then cost 4 request and 16 response bytes.
+    Methods without a dedicated command id fall back to CMD_EVAL and keep the text return values.
+    """
+
+    def __init__(self, port='/dev/ttyUSB0',
+                       remote_bus_server='bus_servo',
+                       max_read_size=50,
+                       timeout=0.1):
+        super().__init__(port=port,
+                         remote_bus_server=remote_bus_server,
+                         max_read_size=max_read_size,
+                         raw_mode=True)
+        self.timeout = timeout
+        self.upload_helper()
+        self.start_server()
+
+    def upload_helper(self):
+        code = BOARD_HELPER.encode()
+        # small chunks so the board's UART buffer is not overrun while it compiles
+        for i in range(0, len(code), 256):
+            self.con.write(code[i:i + 256])
+            time.sleep(0.01)
+        self.con.write(CTRL_D)
+        # compiling the helper takes longer than a regular command
+        timeout, self.con.timeout = self.con.timeout, 2.
+        try:
+            res = self.con.read_until(b'>')
+        finally:
+            self.con.timeout = timeout
+        if b'OK' not in res or b'Traceback' in res:
+            raise Exception(f'could not upload binary helper: {res.decode(errors="ignore")}')
+
+    def start_server(self):
+        self.con.write(f'_xb_serve({self.remote_bus_server})'.encode() + CTRL_D)
+        res = self.con.read(2)
+        if res != b'OK':
+            raise Exception(f'could not start binary server, got {res}')
+
+    def stop_server(self):
+        self.request(CMD_EXIT)
+        self.con.read_until(b'>')
+        self._unread_replies = 0
+
+    def close(self):
+        # leave the board in its raw REPL for the next connection
+        try:
+            self.stop_server()
+        except Exception:
+            pass
+        super().close()
+
+    def _read_exact(self, n, deadline):
+        self.con.timeout = max(deadline - time.perf_counter(), 0.)
+        data = self.con.read(n)
+        if len(data) != n:
+            raise TimeoutError(f'expected {n} bytes, got {len(data)}')
+        return data
+
+    def _read_frame(self, deadline):
+        """The next response frame as (cmd, payload), raises TimeoutError when deadline passes first."""
+        timeout = self.con.timeout
+        try:
+            while self._read_exact(1, deadline)[0] != RESPONSE_HEADER:
+                pass
+            res_cmd, n = self._read_exact(2, deadline)
+            res_payload = self._read_exact(n, deadline) if n else b''
+            checksum = self._read_exact(1, deadline)[0]
+        except TimeoutError:
+            # a partly read frame is skipped by the header search of the next read
+            if self._unread_since is None:
+                self._unread_since = time.perf_counter()
+            raise
+        finally:
+            self.con.timeout = timeout
+        self._unread_replies -= 1
+        if not self._unread_replies:
+            self._unread_since = None
+        if checksum != (res_cmd + n + sum(res_payload)) & 0xFF:
+            raise ValueError(f'checksum mismatch for response {res_cmd:#x}')
+        return res_cmd, res_payload
+
+    def request(self, cmd, payload=b'', timeout=None):
+        """:param timeout: seconds to wait for the response, None uses self.timeout"""
+        start = time.perf_counter()
+        deadline = start + (self.timeout if timeout is None else timeout)
+        name = COMMAND_NAMES.get(cmd, hex(cmd))
+        try:
+            self._drain_unread_replies(deadline, self._read_frame)
+            self.con.write(encode_frame(REQUEST_HEADER, cmd, payload))
+            self._unread_replies += 1
+            res_cmd, res_payload = self._read_frame(deadline)
+        except TimeoutError:
+            if self.stats is not None:
+                self.stats.count(name, 'timeouts')
+            raise
+        except ValueError:
+            if self.stats is not None:
+                self.stats.count(name, 'parse_failures')
+            raise
+        if self.stats is not None:
+            self.stats.record(name, time.perf_counter() - start, sent=len(payload) + 4, received=len(res_payload) + 4)
+        if res_cmd == CMD_ERROR:
+            raise Exception(f'board error for command {cmd:#x}: {res_payload.decode(errors="ignore")}')
+        if res_cmd != cmd:
+            raise Exception(f'response for command {res_cmd:#x} while waiting for {cmd:#x}')
+        return res_payload
+
+    def run_command(self, command, timeout=None):
+        return self.request(CMD_EVAL, command.encode(), timeout=timeout).decode()
+
+    def run(self, id, p, servo_run_time=1000):
+        self.request(CMD_RUN, struct.pack('<BhH', id, p, servo_run_time))
+
+    def run_mult(self, pp, servo_run_time):
+        payload = struct.pack('<H', servo_run_time) + b''.join(struct.pack('<Bh', id, p) for id, p in pp)
+        self.request(CMD_RUN_MULT, payload)
+
+    def load(self, id):
+        self.request(CMD_LOAD, bytes((id,)))
+
+    def unload(self, id):
+        self.request(CMD_UNLOAD, bytes((id,)))
+
+    def get_position(self, id):
+        return struct.unpack('<h', self.request(CMD_GET_POSITION, bytes((id,))))[0]
+
+    def get_positions(self, timeout=None):
+        return list(struct.unpack('<6h', self.request(CMD_GET_POSITIONS, timeout=timeout)))
+
+    def set_positions(self, goal_positions, servo_run_time):
+        assert len(goal_positions) == 6
+        self.request(CMD_SET_POSITIONS, struct.pack('<6hH', *goal_positions, servo_run_time))
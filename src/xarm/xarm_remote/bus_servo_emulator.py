@@ -0,0 +1,323 @@
+import ast
+import os
+import select
+import struct
+import threading
+import time
+import tty
+
+from .bus_servo_serial import CTRL_A, CTRL_B, CTRL_C, CTRL_D
+from .bus_servo_binary import (encode_frame, REQUEST_HEADER, RESPONSE_HEADER, CMD_GET_POSITIONS, CMD_GET_POSITION,
+                               CMD_RUN, CMD_RUN_MULT, CMD_SET_POSITIONS, CMD_LOAD, CMD_UNLOAD, CMD_EVAL, CMD_EXIT,
+                               CMD_ERROR)
+
+RAW_BANNER = b'raw REPL; CTRL-B to exit\r\n>'
+FRIENDLY_BANNER = b'\r\nMicroPython bus_servo emulator\r\n>>> '
+
+
+class ServoModel:
+    """
+    Six bus servos moving linearly from their current position to the goal within servo_run_time ms,
+    the same behaviour the bus_servo module on the board exposes.
+    """
+
+    def __init__(self, positions=(500, 500, 500, 500, 500, 500), vin=7400):
+        self.n = len(positions)
+        self._start = [float(p) for p in positions]
+        self._goal = [float(p) for p in positions]
+        self._t_start = [0.] * self.n
+        self._duration = [0.] * self.n
+        self.loaded = [False] * self.n
+        self.offsets = [0] * self.n
+        self.vin = vin
+        self._lock = threading.Lock()
+
+    def _position(self, i, now):
+        duration = self._duration[i]
+        if duration <= 0 or now >= self._t_start[i] + duration:
+            return self._goal[i]
+        frac = (now - self._t_start[i]) / duration
+        return self._start[i] + (self._goal[i] - self._start[i]) * frac
+
+    def run(self, id, p, servo_run_time=1000):
+        now = time.perf_counter()
+        with self._lock:
+            i = id - 1
+            self._start[i] = self._position(i, now)
+            self._goal[i] = float(max(0, min(1000, p)))
+            self._t_start[i] = now
+            self._duration[i] = max(servo_run_time, 0) / 1000
+
+    def run_mult(self, pp, servo_run_time):
+        for id, p in pp:
+            self.run(id, p, servo_run_time)
+
+    def set_positions(self, goal_positions, servo_run_time):
+        self.run_mult(enumerate(goal_positions, start=1), servo_run_time)
+
+    def stop(self, id):
+        now = time.perf_counter()
+        with self._lock:
+            i = id - 1
+            self._goal[i] = self._start[i] = self._position(i, now)
+            self._duration[i] = 0.
+
+    def get_position(self, id):
+        with self._lock:
+            return int(round(self._position(id - 1, time.perf_counter())))
+
+    def get_positions(self):
+        now = time.perf_counter()
+        with self._lock:
+            return [int(round(self._position(i, now))) for i in range(self.n)]
+
+    def load(self, id):
+        self.loaded[id - 1] = True
+
+    def unload(self, id):
+        self.loaded[id - 1] = False
+
+    def get_vin(self, id):
+        return self.vin
+
+    def get_ID(self, id):
+        return id
+
+    def set_ID(self, old_id, new_id):
+        pass
+
+    def set_mode(self, id, mode, speed=0):
+        pass
+
+    def run_add_or_dec(self, id, speed):
+        pass
+
+    def servo_receive_handle(self):
+        pass
+
+    def adjust_offset(self, id, offset):
+        self.offsets[id - 1] = offset
+
+    def save_offset(self, id):
+        pass
+
+    def get_offset(self, id):
+        return self.offsets[id - 1]
+
+
+class BusServoEmulator:
+    """
+    pty-backed stand-in for the MicroPython board running bus_servo.
+
+    Speaks the friendly and raw REPL dialect BusServoSerial expects (CTRL_A/B/C/D, OK, > and >>> prompts),
+    plus the binary frames of BusServoSerialBinary once its helper was uploaded. Only calls of the form
+    print(bus_servo.method(literals)) are evaluated, anything else answers with a traceback.
+
+    :param latency: seconds added to every command before the response is written
+    :param baudrate: bytes in both directions are paced at 10 bits per byte, None disables the model
+    """
+
+    def __init__(self, latency=0.001, baudrate=115200, remote_bus_server='bus_servo', servos=None):
+        self.latency = latency
+        self.baudrate = baudrate
+        self.remote_bus_server = remote_bus_server
+        self.servos = servos if servos is not None else ServoModel()
+        self.commands = 0
+        self._mode = 'friendly'
+        self._buf = bytearray()
+        self._last_friendly = b''
+        self._helper_loaded = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._serve, name='bus-servo-emulator', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _wire_time(self, n_bytes):
+        return n_bytes * 10 / self.baudrate if self.baudrate else 0.
+
+    def _write(self, data: bytes):
+        if wire_time := self._wire_time(len(data)):
+            time.sleep(wire_time)
+        os.write(self._master, data)
+
+    def _serve(self):
+        while not self._stop_event.is_set():
+            readable, _, _ = select.select([self._master], [], [], 0.05)
+            if not readable:
+                continue
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                return
+            for b in data:
+                self._feed(bytes((b,)))
+            if self._mode == 'binary':
+                self._process_frames()
+
+    def _feed(self, b: bytes):
+        if self._mode == 'binary':
+            self._buf.extend(b)
+        elif self._mode == 'raw':
+            self._feed_raw(b)
+        else:
+            self._feed_friendly(b)
+
+    def _feed_raw(self, b: bytes):
+        if b == CTRL_A:
+            self._buf.clear()
+            self._write(RAW_BANNER)
+        elif b == CTRL_B:
+            self._buf.clear()
+            self._mode = 'friendly'
+            self._write(FRIENDLY_BANNER)
+        elif b == CTRL_C:
+            self._buf.clear()
+        elif b == CTRL_D:
+            code = self._buf.decode(errors='ignore')
+            self._buf.clear()
+            if code.strip().startswith('_xb_serve(') and self._helper_loaded:
+                self._mode = 'binary'
+                self._write(b'OK')
+                return
+            out, err = self.execute(code, raw=True)
+            self._write(b'OK' + out.encode() + CTRL_D + err.encode() + CTRL_D + b'>')
+        else:
+            self._buf.extend(b)
+
+    def _feed_friendly(self, b: bytes):
+        if b == CTRL_A:
+            self._buf.clear()
+            self._mode = 'raw'
+            self._write(b'\r\n' + RAW_BANNER)
+        elif b in (CTRL_B, CTRL_C):
+            self._buf.clear()
+            self._write(FRIENDLY_BANNER if b == CTRL_B else b'\r\n>>> ')
+        elif b in (b'\r', b'\n'):
+            if b == b'\n' and self._last_friendly == b'\r':
+                self._last_friendly = b
+                return
+            code = self._buf.decode(errors='ignore')
+            self._buf.clear()
+            out, err = self.execute(code, raw=False)
+            self._write(b'\r\n' + (out + err).encode() + b'>>> ')
+        else:
+            self._buf.extend(b)
+            self._write(b)
+        self._last_friendly = b
+
+    def _call(self, node):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+                and isinstance(node.func.value, ast.Name) and node.func.value.id == self.remote_bus_server:
+            method = getattr(self.servos, node.func.attr, None)
+            if method is None or node.func.attr.startswith('_'):
+                raise AttributeError(f"'module' object has no attribute '{node.func.attr}'")
+            args = [ast.literal_eval(arg) for arg in node.args]
+            self.commands += 1
+            return method(*args)
+        raise NotImplementedError(f'emulator cannot evaluate {ast.dump(node)}')
+
+    def execute(self, code, raw=True):
+        """Evaluate REPL input, returns (stdout, stderr) the way the board would print them."""
+        wire_time = self._wire_time(len(code))
+        time.sleep(self.latency + wire_time)
+        if 'def _xb_serve' in code:
+            self._helper_loaded = True
+            return '', ''
+        out = []
+        try:
+            for stmt in ast.parse(code).body:
+                if not isinstance(stmt, ast.Expr):
+                    raise NotImplementedError(f'emulator cannot execute {type(stmt).__name__}')
+                node = stmt.value
+                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'print':
+                    out.append(' '.join(str(self._call(arg)) for arg in node.args) + '\r\n')
+                else:
+                    value = self._call(node)
+                    if not raw and value is not None:
+                        out.append(repr(value) + '\r\n')
+        except Exception as e:
+            return ''.join(out), f'Traceback (most recent call last):\r\n{type(e).__name__}: {e}\r\n'
+        return ''.join(out), ''
+
+    def _process_frames(self):
+        buf = self._buf
+        while True:
+            start = buf.find(bytes((REQUEST_HEADER,)))
+            if start < 0:
+                buf.clear()
+                return
+            del buf[:start]
+            if len(buf) < 3 or len(buf) < 4 + buf[2]:
+                return
+            cmd, n = buf[1], buf[2]
+            payload, checksum = bytes(buf[3:3 + n]), buf[3 + n]
+            del buf[:4 + n]
+
+            time.sleep(self.latency)
+            if checksum != (cmd + n + sum(payload)) & 0xFF:
+                self._write(encode_frame(RESPONSE_HEADER, CMD_ERROR, b'checksum'))
+                continue
+            try:
+                out = self._binary_command(cmd, payload)
+            except Exception as e:
+                cmd, out = CMD_ERROR, str(e).encode()[:255]
+            self._write(encode_frame(RESPONSE_HEADER, cmd, out))
+            if cmd == CMD_EXIT:
+                self._mode = 'raw'
+                buf.clear()
+                self._write(CTRL_D + CTRL_D + b'>')
+                return
+
+    def _binary_command(self, cmd, p):
+        self.commands += 1
+        servos = self.servos
+        if cmd == CMD_GET_POSITIONS:
+            return struct.pack('<6h', *servos.get_positions())
+        if cmd == CMD_GET_POSITION:
+            return struct.pack('<h', servos.get_position(p[0]))
+        if cmd == CMD_RUN:
+            servos.run(*struct.unpack('<BhH', p))
+        elif cmd == CMD_RUN_MULT:
+            t = struct.unpack('<H', p[:2])[0]
+            servos.run_mult([struct.unpack('<Bh', p[k:k + 3]) for k in range(2, len(p), 3)], t)
+        elif cmd == CMD_SET_POSITIONS:
+            v = struct.unpack('<6hH', p)
+            servos.set_positions(list(v[:6]), v[6])
+        elif cmd == CMD_LOAD:
+            servos.load(p[0])
+        elif cmd == CMD_UNLOAD:
+            servos.unload(p[0])
+        elif cmd == CMD_EVAL:
+            self.commands -= 1
+            node = ast.parse(f'{self.remote_bus_server}.{p.decode()}', mode='eval').body
+            return str(self._call(node)).encode()[:255]
+        elif cmd != CMD_EXIT:
+            raise ValueError('unknown command')
+        return b''
@@ -1,31 +1,133 @@
 import json
+import logging
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
 
 class BusServoHttp:
-    def __init__(self, address):
+    """
+    HTTP transport for the bus_servo board.
+
+    Single commands use GET /command?method=..&params=.., several commands can be sent in one round trip
+    with run_batch (POST /batch, JSON {"commands": [{"method", "params"}]} -> {"results": [...]}). Boards
+    without /batch answer 404, from then on batches are sent as single /command requests and run_mult as
+    one run per servo. Commands the board rejects raise requests.HTTPError. One keep-alive connection is
+    reused, when the board cannot be reached a request raises ConnectionError (TimeoutError on timeouts)
+    and further calls raise immediately for an exponentially growing backoff (capped at max_backoff)
+    before the connection is reopened.
+    """
+    stats = None  # optional xarm.utils.bus_stats.BusStats
+
+    def __init__(self, address, timeout=1., max_backoff=2., verbose=False):
         self.address = address
-        self.session = requests.Session()
-
-    def run_command(self, command, params):
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.verbose = verbose
+        self._failures = 0
+        self._retry_at = 0.
+        self.batch_supported = True
+        self.session = self._new_session()
+
+    @staticmethod
+    def _new_session():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, command, method, url, missing_ok=False, timeout=None, **kwargs):
+        """
+        :param missing_ok: return None instead of raising when the board answers 404
+        :param timeout: seconds for this request, None uses self.timeout
+        """
+        if time.perf_counter() < self._retry_at:
+            raise ConnectionError(f'skipping {command}, connection backoff active')
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self.timeout if timeout is None else timeout,
+                                            **kwargs)
+            if self.verbose:
+                print(response.text)
+            if missing_ok and response.status_code == 404:
+                return None
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            # the board is reachable and rejected this command, later commands go through as usual
+            logger.warning(f"Request failed: {e}")
+            if self.stats is not None:
+                self.stats.count(command, 'errors')
+            raise
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logger.warning(f"Request failed: {e}")
+            if self.stats is not None:
+                self.stats.count(command, 'timeouts' if isinstance(e, requests.Timeout) else 'errors')
+            self._failures += 1
+            self._retry_at = time.perf_counter() + min(self.max_backoff, 0.05 * 2 ** (self._failures - 1))
+            if isinstance(e, requests.ConnectionError):
+                self.session.close()
+                self.session = self._new_session()
+            if isinstance(e, requests.Timeout):
+                raise TimeoutError(f'{command} timed out: {e}') from e
+            raise ConnectionError(f'{command} failed: {e}') from e
+        self._failures = 0
+        if self.stats is not None:
+            sent = len(url) + len(kwargs.get('data') or b'')
+            self.stats.record(command, time.perf_counter() - start, sent=sent, received=len(response.content))
+        return response
+
+    def run_command(self, command, params, timeout=None):
         if params:
             url = f"{self.address}/command?method={command}&params={','.join(map(str, params))}"
         else:
             url = f"{self.address}/command?method={command}"
-        try:
-            response = self.session.get(url)
-            print(response.text)
-            response.raise_for_status()
-            return response.json() if response.headers['Content-Type'] == 'application/json' else response.text
-        except requests.RequestException as e:
-            print(f"Request failed: {e}")
-            self.session = requests.Session()  # Reopen session if connection fails
+        response = self._request(command, 'GET', url, timeout=timeout)
+        return response.json() if response.headers['Content-Type'] == 'application/json' else response.text
+
+    def _post_batch(self, commands):
+        """Results of POST /batch, None if the board has no /batch endpoint."""
+        if not self.batch_supported:
+            return None
+        data = json.dumps({'commands': [{'method': method, 'params': list(params)} for method, params in commands]})
+        response = self._request('batch', 'POST', f"{self.address}/batch", missing_ok=True,
+                                 data=data.encode(), headers={'Content-Type': 'application/json'})
+        if response is None:
+            logger.info(f'{self.address} has no /batch endpoint, sending commands one by one')
+            self.batch_supported = False
             return None
+        results = response.json()['results']
+        for (method, _), result in zip(commands, results):
+            if isinstance(result, dict) and 'error' in result:
+                raise Exception(f"board error for {method}: {result['error']}")
+        return results
+
+    def run_batch(self, commands):
+        """
+        :param commands: list of (method, params) tuples, executed in order on the board
+        :return: list of results, raises if the board reports an error for any command
+        """
+        results = self._post_batch(commands)
+        if results is None:
+            results = [self.run_command(method, params) for method, params in commands]
+        return results
 
     def run(self, id, p, servo_run_time=1000):
         return self.run_command('run', [id, p, servo_run_time])
 
     def run_mult(self, pp, servo_run_time):
-        return self.run_command('run_mult', [pp, servo_run_time])
+        # nested params do not survive the comma separated query string
+        results = self._post_batch([('run_mult', [pp, servo_run_time])])
+        if results is not None:
+            return results[0]
+        for id, p in pp:
+            self.run(id, p, servo_run_time)
 
     def run_add_or_dec(self, id, speed):
         return self.run_command('run_add_or_dec', [id, speed])
@@ -54,11 +156,15 @@ class BusServoHttp:
     def get_position(self, id):
         return int(self.run_command('get_position', [id]))
 
-    def get_positions(self):
-        pos_string = self.run_command('get_positions', [])
+    def get_positions(self, timeout=None):
+        pos_string = self.run_command('get_positions', [], timeout=timeout)
+        if isinstance(pos_string, list):
+            return pos_string
         try:
             return json.loads(pos_string)
-        except json.JSONDecodeError:
+        except (TypeError, json.JSONDecodeError):
+            if self.stats is not None:
+                self.stats.count('get_positions', 'parse_failures')
             raise Exception(f'Could not get position from string {pos_string}')
 
     def set_positions(self, goal_positions, servo_run_time):
@@ -0,0 +1,117 @@
+import ast
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .bus_servo_emulator import ServoModel
+
+
+def _parse_param(value):
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body: bytes, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _call(self, method, params):
+        if method.startswith('_') or not hasattr(self.server.servos, method):
+            raise AttributeError(f'unknown method {method}')
+        time.sleep(self.server.latency)
+        self.server.commands += 1
+        return getattr(self.server.servos, method)(*params)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != '/command':
+            return self._reply(404, b'not found', 'text/plain')
+        query = parse_qs(url.query)
+        method = query.get('method', [''])[0]
+        params = [_parse_param(p) for p in query['params'][0].split(',')] if 'params' in query else []
+        try:
+            result = self._call(method, params)
+        except Exception as e:
+            return self._reply(400, str(e).encode(), 'text/plain')
+        # the board answers single commands with the printed result
+        self._reply(200, str(result).encode(), 'text/plain')
+
+    def do_POST(self):
+        # read the body even when it is rejected, the connection is reused for the next request
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlsplit(self.path).path != '/batch' or not self.server.batch:
+            return self._reply(404, b'not found', 'text/plain')
+        body = json.loads(body)
+        results = []
+        for command in body['commands']:
+            try:
+                results.append(self._call(command['method'], command.get('params', [])))
+            except Exception as e:
+                results.append({'error': str(e)})
+        self._reply(200, json.dumps({'results': results}).encode(), 'application/json')
+
+
+class BusServoHttpServer(ThreadingHTTPServer):
+    """
+    Reference stand-in for the board's HTTP endpoint, serving GET /command and POST /batch
+    against a ServoModel. batch=False leaves out /batch like the current board firmware.
+    Port 0 picks a free port, see self.address.
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.001, servos=None, batch=True):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.batch = batch
+        self.servos = servos if servos is not None else ServoModel()
+        self.commands = 0
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='bus-servo-http', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+    with BusServoHttpServer(args.host, args.port) as server:
+        print(f'serving bus_servo on {server.address}')
+        server._thread.join()
@@ -12,11 +12,26 @@ def print_open_ports():
 CTRL_A, CTRL_B, CTRL_C, CTRL_D = b"\x01", b"\x02", b"\x03", b"\x04"
 
 class BusServoSerial:
+    """
+    Serial transport for the bus_servo board, commands are eval'd on its MicroPython REPL.
+
+    Every command may be given a timeout shorter than the connection's. A reply that misses it is still
+    sent by the board, so it is read and discarded before the next command goes out, which keeps every
+    reply paired with its own command. Replies missing for longer than lost_reply_s count as lost.
+    """
+    stats = None  # optional xarm.utils.bus_stats.BusStats
+    lost_reply_s = 1.
+
     def __init__(self, port='/dev/ttyUSB0',
                        remote_bus_server='bus_servo',
                        max_read_size=50,
-                       raw_mode=True):
+                       raw_mode=True,
+                       timeout=None):
+        """:param timeout: serial read timeout once connected, None keeps 0.1 s in raw mode and 0.01 s otherwise"""
         self.max_read_size = max_read_size
+        self._received = 0
+        self._unread_replies = 0
+        self._unread_since = None
         self.remote_bus_server=remote_bus_server
 
         self.con = serial.Serial(port,
@@ -24,8 +39,7 @@ class BusServoSerial:
                                  timeout=0.1 if raw_mode else 0.01,
                                  )
 
-        self.con.write(CTRL_B)
-        self.con.read(self.max_read_size)
+        self.reach_repl()
         self.con.write(CTRL_C)
         self.con.read(self.max_read_size)
         self.con.read(self.max_read_size)
@@ -33,23 +47,75 @@ class BusServoSerial:
         self.raw_mode = raw_mode
         if raw_mode:
             self.enter_raw_mode()
+        if timeout is not None:
+            self.con.timeout = timeout
 
     def __del__(self):
         self.con.close()
 
-    def run_command(self, command):
-
-        if self.raw_mode:
-            send_command = f'print({self.remote_bus_server}.{command})\n'
-            self.con.write(send_command.encode() +  CTRL_D)
-            res = self.parse_raw_result()
-        else:
-            self.con.read(size=self.max_read_size)
-            send_command = f'{self.remote_bus_server}.{command}\r\n'
-            self.con.write(send_command.encode())
-            res = self.parse_result(command)
+    def close(self):
+        self.con.close()
+
+    def run_command(self, command, timeout=None):
+        """:param timeout: seconds to wait for the reply, None uses the connection's timeout (0.2 s friendly)"""
+        start = time.perf_counter()
+        if timeout is None:
+            # the friendly REPL echoes the command before answering, its reads need longer
+            timeout = self.con.timeout if self.raw_mode else 0.2
+        deadline = start + timeout
+        try:
+            self._drain_unread_replies(deadline)
+            if self.raw_mode:
+                send_command = f'print({self.remote_bus_server}.{command})\n'
+                self.con.write(send_command.encode() +  CTRL_D)
+                self._unread_replies += 1
+                res = self.parse_raw_result(deadline)
+            else:
+                self.con.read(size=self.max_read_size)
+                send_command = f'{self.remote_bus_server}.{command}\r\n'
+                self.con.write(send_command.encode())
+                self._unread_replies += 1
+                res = self.parse_result(command, deadline)
+        except TimeoutError:
+            if self.stats is not None:
+                self.stats.count(command.split('(')[0], 'timeouts')
+            raise
+        if self.stats is not None:
+            self.stats.record(command.split('(')[0], time.perf_counter() - start,
+                              sent=len(send_command) + self.raw_mode, received=self._received)
         return res
 
+    def reach_repl(self, timeout=0.1):
+        """
+        Bring the board to its friendly REPL with CTRL_B. A board on either REPL answers with its prompt right
+        away, only a board that stays silent gets the slower leave_binary_mode recovery.
+        """
+        timeout, self.con.timeout = self.con.timeout, timeout
+        try:
+            self.con.write(CTRL_B)
+            if self.con.read_until(b'>>> ').endswith(b'>>> '):
+                return
+        finally:
+            self.con.timeout = timeout
+        self.leave_binary_mode()
+        self.con.write(CTRL_B)
+        self.con.read(self.max_read_size)
+
+    def leave_binary_mode(self, timeout=0.1):
+        """
+        Stop a binary helper left running by a connection that never closed (killed process). The helper
+        disables Ctrl-C, so only its exit frame brings the board back to the REPL. Without a helper the
+        frame is line noise, which the following CTRL_B / CTRL_C discard.
+        """
+        from .bus_servo_binary import CMD_EXIT, REQUEST_HEADER, encode_frame
+        self.con.write(encode_frame(REQUEST_HEADER, CMD_EXIT))
+        timeout, self.con.timeout = self.con.timeout, timeout
+        try:
+            self.con.read_until(b'>')
+        finally:
+            self.con.timeout = timeout
+        self.con.reset_input_buffer()
+
     def enter_raw_mode(self):
         self.con.write(CTRL_C)
         time.sleep(0.01)
@@ -57,25 +123,51 @@ class BusServoSerial:
         time.sleep(0.01)
         self.con.read(self.max_read_size)
 
-    def _read_until(self, marker: bytes, timeout=0.2) -> str:
-        buf = bytearray()
-        t0 = time.time()
-        while marker not in buf:
-            n = self.con.in_waiting
-            if n:
-                chunk = self.con.read(n)
-                buf.extend(chunk)
-            if time.time() - t0 > timeout:
-                raise TimeoutError("Prompt not seen within %.1f s" % timeout)
-        return buf.decode(errors='ignore')
-
-
-    def parse_raw_result(self):
-        res = self.con.read_until(b'>')
+    def _read_prompt_reply(self, deadline) -> bytes:
+        """The next reply up to and including its prompt, raises TimeoutError when deadline passes first."""
+        prompt = b'>' if self.raw_mode else b'>>>'
+        timeout, self.con.timeout = self.con.timeout, max(deadline - time.perf_counter(), 0.)
+        try:
+            res = self.con.read_until(prompt)
+        finally:
+            self.con.timeout = timeout
+        if not res.endswith(prompt):
+            # the rest of this reply is still owed and read by the next _drain_unread_replies
+            if self._unread_since is None:
+                self._unread_since = time.perf_counter()
+            raise TimeoutError('prompt not seen before the deadline')
+        self._unread_replies -= 1
+        if not self._unread_replies:
+            self._unread_since = None
+        return res
+
+    def _drain_unread_replies(self, deadline, read_reply=None):
+        """
+        Discard replies of commands that timed out, the next reply read is then the next command's.
+        :param read_reply: reads one reply of the current protocol, defaults to the REPL's
+        """
+        read_reply = read_reply or self._read_prompt_reply
+        while self._unread_replies:
+            try:
+                read_reply(deadline)
+            except TimeoutError:
+                if time.perf_counter() - self._unread_since < self.lost_reply_s:
+                    raise TimeoutError('board still answering an earlier command') from None
+                # no reply for this long, the board dropped it
+                self.con.reset_input_buffer()
+                self._unread_replies = 0
+                self._unread_since = None
+            except ValueError:
+                pass  # a corrupt late reply is discarded all the same
+
+    def parse_raw_result(self, deadline):
+        res = self._read_prompt_reply(deadline)
+        self._received = len(res)
         return res[res.find(b'OK')+2:res.find(b'\r')].decode()
 
-    def parse_result(self, command):
-        res = self._read_until(b'>>>', timeout=0.2)
+    def parse_result(self, command, deadline):
+        res = self._read_prompt_reply(deadline).decode(errors='ignore')
+        self._received = len(res)
         return res[res.find(command) + len(command):].split('>>>')[0].replace('\r', '').replace('\n', '')
 
     def run(self, id, p, servo_run_time=1000):
@@ -111,12 +203,14 @@ class BusServoSerial:
     def get_position(self, id):
         return int(self.run_command(f'get_position({id})'))
 
-    def get_positions(self):
-        pos_string =  self.run_command(f'get_positions()')
+    def get_positions(self, timeout=None):
+        pos_string =  self.run_command(f'get_positions()', timeout=timeout)
         try:
             json.loads(pos_string)
             return json.loads(pos_string)
         except:
+            if self.stats is not None:
+                self.stats.count('get_positions', 'parse_failures')
             raise Exception(f'could not get position from string {pos_string}')
 
     def set_positions(self, goal_positions, servo_run_time):
@@ -0,0 +1,108 @@
+import ast
+import random
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+
+from .bus_servo_emulator import ServoModel
+
+
+def parse_command(body: str):
+    command, _, params = body.partition('-')
+    # nested params like run_mult's list of [id, p] pairs survive the comma join this way
+    return command, list(ast.literal_eval(f'[{params}]')) if params else []
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        server = self.server
+        if server.loss and server.random.random() < server.loss:
+            return
+        body = data.decode()
+        req_id = None
+        if '|' in body:
+            req_id, body = body.split('|', 1)
+            key = (self.client_address, req_id)
+            if key in server.replies:
+                # retransmit of an executed request, the reply was lost: resend it, do not run it again
+                return self._send_chunks(req_id, server.replies[key])
+        try:
+            command, params = parse_command(body)
+            if command.startswith('_') or not hasattr(server.servos, command):
+                raise AttributeError(f'unknown method {command}')
+            time.sleep(server.latency)
+            server.commands += 1
+            reply = str(getattr(server.servos, command)(*params))
+        except Exception as e:
+            reply = f'ERROR {e}'
+
+        if req_id is None:
+            sock.sendto(reply.encode(), self.client_address)
+            return
+        server.replies[key] = reply
+        if len(server.replies) > server.reply_cache:
+            server.replies.popitem(last=False)
+        self._send_chunks(req_id, reply)
+
+    def _send_chunks(self, req_id, reply):
+        data, sock = self.request
+        size = self.server.max_payload
+        chunks = [reply[i:i + size] for i in range(0, len(reply), size)] or ['']
+        for i, chunk in enumerate(chunks):
+            sock.sendto(f'{req_id}|{i}/{len(chunks)}|{chunk}'.encode(), self.client_address)
+
+
+class BusServoUdpServer(socketserver.UDPServer):
+    """
+    Local stand-in for the board's UDP endpoint against a ServoModel. Answers the legacy one-datagram
+    protocol and the sequenced protocol of BusServoSocket, replies are split into max_payload sized
+    chunks. loss drops that fraction of incoming datagrams to exercise retransmits.
+
+    Like the board, datagrams are handled one at a time in arrival order, so pipelined requests run in
+    the order they were sent. The last reply_cache sequenced replies are kept per (client, request id)
+    and a retransmitted request is answered from the cache instead of running again, which keeps
+    non-idempotent commands such as run_add_or_dec from being applied twice.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.001, servos=None, max_payload=512, loss=0., seed=0,
+                 reply_cache=256):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.servos = servos if servos is not None else ServoModel()
+        self.max_payload = max_payload
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.commands = 0
+        self.reply_cache = reply_cache
+        self.replies = OrderedDict()
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name='bus-servo-udp', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,19 +1,153 @@
 import socket
+import time
+
 from .bus_servo_http import BusServoHttp
 
+MAX_DATAGRAM = 65507
+
+
+def encode_command(command, params):
+    if params:
+        return f"{command}-{','.join(map(str, params))}"
+    return f"{command}"
+
+
 class BusServoSocket(BusServoHttp):
+    """
+    UDP transport for the bus_servo board.
+
+    By default one datagram is sent and one reply awaited per command. With sequenced=True requests are
+    prefixed with a request id ("<id>|<command>-<params>") and replies come back as one or more datagrams
+    "<id>|<chunk>/<n_chunks>|<payload>". Several requests can then be in flight (run_commands), a lost
+    datagram is retransmitted after request_timeout instead of waiting for the socket timeout, and
+    replies of any length are reassembled. A retransmit may repeat a request the board already executed
+    (only the reply was lost), so the board has to execute requests in arrival order and answer a
+    repeated request id from a cache of recent replies instead of running it again, see
+    bus_servo_udp_server.BusServoUdpServer.
+    """
 
-    def __init__(self, host_ip, port=5005, timeout=5):
+    def __init__(self, host_ip, port=5005, timeout=5, sequenced=False, request_timeout=0.05, retransmits=3):
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect((host_ip, port))
         s.settimeout(timeout)
         self.s = s
+        self.timeout = timeout
+        self.sequenced = sequenced
+        self.request_timeout = request_timeout
+        self.retransmits = retransmits
+        self._req_id = 0
+
+    def close(self):
+        self.s.close()
 
-    def run_command(self, command, params):
-        if params:
-            data = f"{command}-{','.join(map(str, params))}"
-        else:
-            data = f"{command}"
+    def run_command(self, command, params, timeout=None):
+        if self.sequenced:
+            return self.run_commands([(command, params)], timeout=timeout)[0]
+
+        data = encode_command(command, params)
+        start = time.perf_counter()
+        self._drain_late_replies()
         self.s.sendall(data.encode())
-        response, _ = self.s.recvfrom(64)
-        return response.decode()
\ No newline at end of file
+        try:
+            self.s.settimeout(self.timeout if timeout is None else timeout)
+            response, _ = self.s.recvfrom(MAX_DATAGRAM)
+        except socket.timeout:
+            if self.stats is not None:
+                self.stats.count(command, 'timeouts')
+            raise
+        finally:
+            self.s.settimeout(self.timeout)
+        if self.stats is not None:
+            self.stats.record(command, time.perf_counter() - start, sent=len(data), received=len(response))
+        return response.decode()
+
+    def _drain_late_replies(self):
+        """Drop replies to timed out legacy requests, they would be taken for the next request's reply."""
+        self.s.setblocking(False)
+        try:
+            while True:
+                self.s.recv(MAX_DATAGRAM)
+        except (BlockingIOError, ConnectionRefusedError):
+            pass
+        finally:
+            self.s.settimeout(self.timeout)
+
+    def _next_id(self):
+        self._req_id = (self._req_id + 1) % 65536
+        return self._req_id
+
+    def run_commands(self, commands, timeout=None):
+        """
+        Send all (command, params) requests at once and collect their replies, requires sequenced=True.
+        :param timeout: seconds until all replies must be in, None retransmits until retransmits is used up
+        :return: list of reply strings in the order of commands
+        """
+        assert self.sequenced, 'pipelined requests need the sequenced protocol'
+        start = time.perf_counter()
+        pending = {}
+        ids = []
+        for command, params in commands:
+            req_id = self._next_id()
+            data = f'{req_id}|{encode_command(command, params)}'.encode()
+            self.s.send(data)
+            pending[req_id] = {'command': command, 'data': data, 'sent': time.perf_counter(),
+                               'tries': 0, 'chunks': {}, 'n_chunks': None, 'received': 0}
+            ids.append(req_id)
+
+        results = {}
+        deadline = None if timeout is None else start + timeout
+        while pending:
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                self.s.settimeout(self.timeout)
+                raise TimeoutError(f"no reply for {len(pending)} of {len(commands)} requests within {timeout * 1e3:.1f} ms")
+            wait = min(p['sent'] for p in pending.values()) + self.request_timeout - now
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            self.s.settimeout(max(wait, 1e-4))
+            try:
+                datagram = self.s.recv(MAX_DATAGRAM)
+            except socket.timeout:
+                self._retransmit(pending)
+                continue
+            try:
+                header, chunk, payload = datagram.decode().split('|', 2)
+                req_id = int(header)
+                index, n_chunks = map(int, chunk.split('/'))
+            except ValueError:
+                continue
+            request = pending.get(req_id)
+            if request is None:
+                # late duplicate of an answered request
+                continue
+            request['chunks'][index] = payload
+            request['n_chunks'] = n_chunks
+            request['received'] += len(datagram)
+            if len(request['chunks']) == n_chunks:
+                results[req_id] = ''.join(request['chunks'][i] for i in range(n_chunks))
+                del pending[req_id]
+                if self.stats is not None:
+                    self.stats.record(request['command'], time.perf_counter() - start,
+                                      sent=len(request['data']) * (request['tries'] + 1), received=request['received'])
+        self.s.settimeout(self.timeout)
+        return [results[req_id] for req_id in ids]
+
+    def _retransmit(self, pending):
+        now = time.perf_counter()
+        for request in pending.values():
+            if now - request['sent'] < self.request_timeout:
+                continue
+            if request['tries'] >= self.retransmits:
+                if self.stats is not None:
+                    self.stats.count(request['command'], 'timeouts')
+                self.s.settimeout(self.timeout)
+                raise TimeoutError(f"no reply for {request['command']} after {request['tries'] + 1} attempts")
+            if self.stats is not None:
+                self.stats.count(request['command'], 'retries')
+            request['tries'] += 1
+            request['sent'] = now
+            # chunks already received stay valid, the server answers a retransmit with the full reply
+            self.s.send(request['data'])
+
+    def run_mult(self, pp, servo_run_time):
+        return self.run_command('run_mult', [pp, servo_run_time])
@@ -1,8 +1,13 @@
+import logging
+import time
+
 import numpy as np
 from retry import retry
 
 from .bus_servo_serial import BusServoSerial
 
+logger = logging.getLogger(__name__)
+
 def pwm2pos(pwm:np.ndarray) -> np.ndarray:
     """
     :param pwm: numpy array of pwm values in range [0, 1000]
@@ -26,6 +31,7 @@ class BusServoRemoteTelopt(BusServoSerial):
                                                    max_read_size=max_read_size,
                                                    timeout=timeout)
         self.last_position = [-10,-10,-10,-10,-10,-10]
+        self._last_read = None
         if active_joints is None:
             self.active_joints = [True for _ in range(6)]
         else:
@@ -42,16 +48,40 @@ class BusServoRemoteTelopt(BusServoSerial):
         for id in servo_ids:
             self.load(id)
 
-    @retry( tries=4, delay=0.03)
-    def read_position(self):
+    def _read_position_once(self, timeout=None):
         try:
-            goal_positions = self.get_positions()
+            goal_positions = self.get_positions(timeout=timeout)
             self.last_position = goal_positions
+            self._last_read = goal_positions
             return np.array(goal_positions)
         except Exception as e:
-            print(f'got exception {e}')
+            logger.debug(f'position read failed: {e}')
             raise e
 
+    @retry( tries=4, delay=0.03)
+    def read_position(self):
+        return self._read_position_once()
+
+    def read_position_within(self, budget_s, delay=0.005):
+        """
+        Retry while budget_s is left, then return the last read positions flagged as stale.
+        Raises TimeoutError if no position was read yet.
+        """
+        deadline = time.perf_counter() + budget_s
+        while True:
+            try:
+                # a slow reply must not hold the caller past its budget either
+                return self._read_position_once(timeout=deadline - time.perf_counter()), False
+            except Exception as e:
+                error = e
+            if time.perf_counter() + delay >= deadline:
+                break
+            time.sleep(delay)
+
+        if self._last_read is None:
+            raise TimeoutError(f'no positions read within {budget_s * 1e3:.1f} ms') from error
+        return np.array(self._last_read), True
+
     def set_goal_pos(self, goal_positions, servo_runtime=250, verbose=True, TOL=3):
         print(goal_positions, pwm2pos(goal_positions))
         MAX_P = 1000
@@ -0,0 +1,73 @@
+import time
+
+import torch.multiprocessing as mp
+
+from action_channel import ACCEPTED, FINISHED, REJECTED, STARTED, ActionChannel
+
+
+def wait_events(channel, n, timeout=5.):
+    events = []
+    end = time.time() + timeout
+    while len(events) < n and time.time() < end:
+        events += channel.poll_events()
+        time.sleep(0.001)
+    return events
+
+
+def test_commands_queue_and_are_acknowledged():
+    channel = ActionChannel()
+    first = channel.submit(1)
+    second = channel.submit(2, time_budget=5.)
+    assert (first.seq, second.seq) == (1, 2)
+    assert channel.busy
+
+    command = channel.next_command(timeout=1.)
+    assert command.action_id == 1
+    channel.report(command, STARTED)
+    channel.report(command, FINISHED, duration_s=0.1)
+    kinds = [e.kind for e in wait_events(channel, 3)]
+    assert kinds == [ACCEPTED, STARTED, FINISHED]
+    assert list(channel.pending) == [2]
+
+    command = channel.next_command(timeout=1.)
+    assert command.time_budget == 5.
+    channel.report(command, FINISHED)
+    wait_events(channel, 2)
+    assert not channel.busy
+    assert channel.next_command(timeout=0) is None
+
+def test_executed_seq_is_rejected():
+    channel = ActionChannel()
+    command = channel.submit(3)
+    assert channel.next_command(timeout=1.) == command
+    channel.commands.put(command)  # duplicate delivery
+    assert channel.next_command(timeout=0.2) is None
+    events = wait_events(channel, 2)
+    assert [e.kind for e in events] == [ACCEPTED, REJECTED]
+    assert not channel.busy
+
+def test_pending_command_expires():
+    channel = ActionChannel(command_timeout=0.)
+    channel.submit(1)
+    time.sleep(0.01)
+    channel.poll_events()
+    assert not channel.busy
+
+
+def robot_stage(channel, n):
+    for _ in range(n):
+        command = channel.next_command(timeout=5.)
+        channel.report(command, STARTED)
+        channel.report(command, FINISHED, duration_s=0.)
+
+def test_across_processes():
+    ctx = mp.get_context('spawn')
+    channel = ActionChannel(ctx=ctx)
+    robot = ctx.Process(target=robot_stage, args=(channel, 2))
+    robot.start()
+    channel.submit(1)
+    channel.submit(4)
+    events = wait_events(channel, 6, timeout=30.)
+    robot.join(10)
+    assert [e.kind for e in events if e.seq == 2] == [ACCEPTED, STARTED, FINISHED]
+    assert not channel.busy
@@ -1,6 +1,10 @@
+import time
+from types import SimpleNamespace
+
 from torch import tensor
 
 import action_controller
+from end_position import EndPoseDetector
 
 
 def test_task_finished():
@@ -102,3 +106,63 @@ def test_prod_error():
         if action_controller.is_position_end_position(pos, verbose=False) is True:
             assert action_controller.is_position_end_position(pos, verbose=True) is False
 
+
+
+class _Follower:
+    action_features = [f'{i}.pos' for i in range(6)]
+    positions_stale = False
+
+    def __init__(self, bus_time):
+        self.bus_time = bus_time
+        self.sent = []
+
+    def get_observation(self, budget_s=None):
+        time.sleep(self.bus_time)
+        return {'t': time.perf_counter()}
+
+    def send_action(self, action):
+        time.sleep(self.bus_time)
+        self.sent.append(action)
+
+def _controller(pipelined, inference_time=0.02, bus_time=0.01, max_action_age=None):
+    controller = action_controller.ActController.__new__(action_controller.ActController)
+    controller.read_budget = 0.5
+    controller.pipelined = pipelined
+    controller.max_action_age = max_action_age
+    controller._inference = None
+    controller.end_detector = EndPoseDetector()
+    controller.follower = _Follower(bus_time)
+    controller._ActController__dataset = SimpleNamespace(fps=1000)
+    def predict(observation, task):
+        time.sleep(inference_time)
+        return tensor([300., 300., 300., 300., 300., 300.])
+    controller._predict = predict
+    return controller
+
+def test_pipelined_overlaps_inference_and_actuation():
+    sequential = _controller(pipelined=False)
+    sequential._run_sequential('flip', None, False, 0.5, None)
+    pipelined = _controller(pipelined=True, max_action_age=1.)
+    pipelined._run_pipelined('flip', None, False, 0.5, None)
+    pipelined.close()
+    # sequential pays read + inference + write per tick, pipelined only the slowest of them
+    assert len(pipelined.follower.sent) > 1.3 * len(sequential.follower.sent)
+
+def test_pipelined_drops_stale_actions():
+    controller = _controller(pipelined=True, inference_time=0.02, bus_time=0., max_action_age=0.005)
+    controller._run_pipelined('flip', None, False, 0.2, None)
+    controller.close()
+    assert controller.follower.sent == []
+
+def test_task_policy_uses_its_own_config(monkeypatch):
+    controller = _controller(pipelined=False)
+    controller.policy_cfg = SimpleNamespace(type='act', device='cuda', use_amp=False, pretrained_path='default')
+    controller.task_policies = {'flip': 'ckpt/flip'}
+    controller._ActController__dataset.meta = None
+    configs = {'ckpt/flip': SimpleNamespace(type='diffusion', device='cpu', use_amp=True)}
+    monkeypatch.setattr(action_controller.PreTrainedConfig, 'from_pretrained', configs.get)
+    monkeypatch.setattr(action_controller, 'make_policy', lambda cfg, ds_meta: cfg)
+    policy_cfg = controller._load_policy('flip')
+    assert (policy_cfg.type, policy_cfg.pretrained_path) == ('diffusion', 'ckpt/flip')
+    assert (policy_cfg.device, policy_cfg.use_amp) == ('cuda', False)
+    assert controller._load_policy(None).type == 'act'
@@ -0,0 +1,55 @@
+import importlib.util
+import os
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip('rubikvision')
+from frame_gate import FrameGate
+
+_spec = importlib.util.spec_from_file_location(
+    'bench_planner', os.path.join(os.path.dirname(__file__), '..', 'scripts', 'bench_planner.py'))
+bench_planner = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench_planner)
+
+
+class FakePlanner:
+    """Proposes a flip on every estimate while the robot is idle."""
+
+    def __init__(self):
+        self.action_executor = SimpleNamespace(current_action='')
+        self.estimates = []
+
+    def init_image(self, image, rotate_img=True):
+        pass
+
+    def estimate_step(self, busy):
+        self.estimates.append(busy)
+        if not busy:
+            self.action_executor.current_action = 'flip'
+
+
+def write_frames(directory, names):
+    image = np.full((64, 48, 3), 128, dtype=np.uint8)
+    for name in names:
+        cv2.imwrite(str(directory / name), image)
+
+
+def test_load_frames_reads_legacy_and_session_names(tmp_path):
+    write_frames(tmp_path, ['s2_img_1_False_sample.jpg', 'img_2_1.png', 's1_img_5_True_flip.jpg',
+                            's1_img_6_exception.jpg'])
+    frames = bench_planner.load_frames(tmp_path)
+    assert [(n, busy, os.path.basename(path)) for n, busy, path in frames] == [
+        (2, True, 'img_2_1.png'), (5, True, 's1_img_5_True_flip.jpg'), (1, False, 's2_img_1_False_sample.jpg')]
+
+
+def test_gate_is_forced_when_busy_changes(tmp_path):
+    write_frames(tmp_path, [f'img_{n}_{busy}.png' for n, busy in enumerate([0, 0, 1, 1, 0, 0], start=1)])
+    planner = FakePlanner()
+    report = bench_planner.replay(bench_planner.load_frames(tmp_path), gate=FrameGate(), cube_planner=planner)
+    # identical frames, only the first one and the ones where busy toggled reach the planner
+    assert planner.estimates == [False, True, False]
+    assert report['skipped'] == 3
+    assert report['actions'] == [(1, 'flip'), (5, 'flip')]
@@ -0,0 +1,34 @@
+import pytest
+
+from xarm.xarm_remote.bus_servo_binary import BusServoSerialBinary, encode_frame, REQUEST_HEADER, CMD_RUN
+
+
+@pytest.fixture(scope='module')
+def servo():
+    servo = BusServoSerialBinary('/dev/ttyUSB0')
+    return servo
+
+def test_encode_frame():
+    frame = encode_frame(REQUEST_HEADER, CMD_RUN, bytes([1, 0xF4, 0x01, 0xE8, 0x03]))
+    assert frame[:3] == bytes([REQUEST_HEADER, CMD_RUN, 5])
+    assert frame[-1] == (CMD_RUN + 5 + 1 + 0xF4 + 0x01 + 0xE8 + 0x03) & 0xFF
+
+def test_get_positions(servo):
+    servo_ids = [1, 2, 3, 4, 5, 6]
+    positions = servo.get_positions()
+    assert len(positions) == 6
+    for n, id in enumerate(servo_ids):
+        position = servo.get_position(id=id)
+        assert abs(position - positions[n]) < 5
+
+def test_eval_fallback(servo):
+    assert int(servo.get_vin(1)) > 0
+
+def test_close_or_open_gripper(servo):
+    id = 1
+    position = servo.get_position(id=id)
+    if position > 350:
+        new_position = 100
+    else:
+        new_position = 550
+    servo.run(id, new_position, 10)
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+
+from xarm.xarm_remote.bus_servo_async import AsyncBusServoSerial
+from xarm.xarm_remote.bus_servo_binary import BusServoSerialBinary
+from xarm.xarm_remote.bus_servo_emulator import BusServoEmulator, ServoModel
+from xarm.xarm_remote.bus_servo_serial import BusServoSerial
+from xarm.xarm_remote.teleopt import BusServoRemoteTelopt
+
+
+@pytest.fixture
+def emulator():
+    with BusServoEmulator(latency=0.) as emulator:
+        yield emulator
+
+def test_servo_model_moves_within_runtime():
+    servos = ServoModel()
+    servos.run(1, 100, 100)
+    assert 100 < servos.get_position(1) <= 500
+    time.sleep(0.12)
+    assert servos.get_position(1) == 100
+    servos.run_mult([[2, 200], [3, 300]], 0)
+    assert servos.get_positions()[1:3] == [200, 300]
+
+@pytest.mark.parametrize('raw_mode', [True, False])
+def test_serial_get_positions(emulator, raw_mode):
+    servo = BusServoSerial(emulator.port, raw_mode=raw_mode)
+    assert servo.get_positions() == [500] * 6
+    servo.run(1, 100, 0)
+    assert servo.get_position(1) == 100
+
+def test_serial_run_mult(emulator):
+    servo = BusServoSerial(emulator.port)
+    servo.run_mult([[1, 100], [6, 900]], 0)
+    assert servo.get_positions() == [100, 500, 500, 500, 500, 900]
+
+def test_serial_unknown_method(emulator):
+    servo = BusServoSerial(emulator.port)
+    with pytest.raises(Exception):
+        servo.get_position(7)
+    assert servo.get_position(1) == 500
+
+def test_binary_protocol(emulator):
+    servo = BusServoSerialBinary(emulator.port)
+    assert servo.get_positions() == [500] * 6
+    servo.set_positions([100, 200, 300, 400, 500, 600], 0)
+    assert servo.get_positions() == [100, 200, 300, 400, 500, 600]
+    servo.run_mult([[1, 700], [2, 800]], 0)
+    assert servo.get_position(2) == 800
+    assert int(servo.get_vin(1)) == 7400
+    servo.stop_server()
+    assert BusServoSerial.run_command(servo, 'get_position(1)') == '700'
+
+def test_connect_skips_binary_recovery_on_repl(emulator, monkeypatch):
+    recoveries = []
+    monkeypatch.setattr(BusServoSerial, 'leave_binary_mode', lambda self: recoveries.append(self))
+    for raw_mode in (True, False, True):
+        assert BusServoSerial(emulator.port, raw_mode=raw_mode).get_positions() == [500] * 6
+    assert recoveries == []
+
+def test_connect_recovers_board_left_in_binary_mode(emulator):
+    servo = BusServoSerialBinary(emulator.port)
+    servo.con.close()  # process killed, CMD_EXIT never sent
+    assert BusServoSerial(emulator.port).get_positions() == [500] * 6
+    servo = BusServoSerialBinary(emulator.port)
+    servo.con.close()
+    assert BusServoSerialBinary(emulator.port).get_positions() == [500] * 6
+
+def test_async_serial(emulator):
+    async def main():
+        async with AsyncBusServoSerial(emulator.port) as servo:
+            await servo.run(3, 250, 0)
+            positions = await asyncio.gather(servo.get_positions(), servo.get_position(3))
+        return positions
+
+    positions, position = asyncio.run(main())
+    assert positions[2] == 250
+    assert position == 250
+
+def test_read_position_within_budget(emulator):
+    servo = BusServoRemoteTelopt(emulator.port)
+    emulator.latency = 0.3
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        servo.read_position_within(0.005)
+    assert time.perf_counter() - start < 0.05
+
+    # the late reply is drained first, replies stay paired with their commands
+    emulator.latency = 0.
+    positions, stale = servo.read_position_within(0.5)
+    assert not stale and list(positions) == [500] * 6
+    servo.run(1, 100, 0)
+    assert servo.get_position(1) == 100
+    assert list(servo.read_position_within(0.5)[0]) == [100] + [500] * 5
+    assert list(servo.read_position_within(0.5)[0]) == [100] + [500] * 5
+
+    emulator.latency = 0.3
+    start = time.perf_counter()
+    positions, stale = servo.read_position_within(0.005)
+    assert stale and list(positions) == [100] + [500] * 5
+    assert time.perf_counter() - start < 0.05
+    emulator.latency = 0.
+    positions, stale = servo.read_position_within(0.5)
+    assert not stale and list(positions) == [100] + [500] * 5
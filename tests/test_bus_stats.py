@@ -0,0 +1,42 @@
+import json
+
+from xarm.utils.bus_stats import BusStats
+from xarm.xarm_remote.bus_servo_emulator import BusServoEmulator
+from xarm.xarm_remote.bus_servo_serial import BusServoSerial
+
+
+def test_record_and_snapshot():
+    stats = BusStats()
+    for latency in [0.001, 0.001, 0.004, 0.030]:
+        stats.record('get_positions', latency, sent=10, received=20)
+    stats.count('get_positions', 'timeouts')
+    snapshot = stats.snapshot()['get_positions']
+    assert snapshot['n'] == 4
+    assert snapshot['bytes_sent'] == 40
+    assert snapshot['bytes_received'] == 80
+    assert snapshot['timeouts'] == 1
+    assert snapshot['p50_ms'] == 1.
+    assert snapshot['p99_ms'] == 33.
+    assert abs(snapshot['max_ms'] - 30.) < 1e-9
+    assert sum(snapshot['hist']) == 4
+
+def test_export_file(tmp_path):
+    stats = BusStats()
+    stats.record('run', 0.002)
+    path = tmp_path / 'bus_stats.jsonl'
+    stats.export_file(path)
+    stats.export_file(path)
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])['commands']['run']['n'] == 1
+
+def test_serial_transport_records():
+    with BusServoEmulator(latency=0.) as emulator:
+        servo = BusServoSerial(emulator.port)
+        servo.stats = BusStats()
+        servo.get_positions()
+        servo.run(1, 100, 0)
+        snapshot = servo.stats.snapshot()
+    assert snapshot['get_positions']['n'] == 1
+    assert snapshot['get_positions']['bytes_received'] > 0
+    assert snapshot['run']['n'] == 1
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import torch
+
+from end_position import ANY_TASK, EndPoseDetector, evaluate_episodes
+
+END = [0, 500., 185., 900., 870., 500.]
+FAR = [300., 300., 300., 300., 300., 300.]
+
+
+def legacy_is_end(position, max_derivation=70):
+    weights = [torch.asarray([0, 1, .05, .1, .8, .2]),
+               torch.asarray([0.3, 1.0, .6, .0, .4, .5]),
+               torch.asarray([0.3, 1.0, .6, .0, .4, .5])]
+    targets = [torch.asarray([0, 500., 185., 900., 870., 500.]),
+               torch.asarray([50, 950, 50, 650, 500, 500]),
+               torch.asarray([50, 150, 50, 650, 500, 500])]
+    return any(bool(w @ (position - t).abs() < max_derivation) for w, t in zip(weights, targets))
+
+
+def test_matches_hand_tuned_heuristic():
+    detector = EndPoseDetector()
+    generator = torch.Generator().manual_seed(0)
+    for target in detector.targets:
+        for _ in range(200):
+            position = target + torch.randn(6, generator=generator) * 60
+            assert detector.is_end(position) == legacy_is_end(position)
+
+def test_hysteresis():
+    detector = EndPoseDetector(hold_frames=3)
+    assert [detector.update(p) for p in (END, END, FAR, END, END, END)] == [False, False, False, False, False, True]
+    detector.reset()
+    assert not detector.update(END)
+
+def test_task_targets_and_file_roundtrip(tmp_path):
+    detector = EndPoseDetector([{'task': 'Flip the Cube', 'target': END, 'weight': [1.] * 6},
+                                {'task': ANY_TASK, 'target': FAR, 'weight': [1.] * 6}])
+    assert detector.is_end(END, 'Flip the Cube')
+    assert not detector.is_end(END, 'Rotate Left Cube')
+    assert detector.is_end(FAR, 'Rotate Left Cube')
+
+    detector.save(tmp_path / 'end_poses.json')
+    loaded = EndPoseDetector.from_file(tmp_path / 'end_poses.json', hold_frames=2)
+    assert loaded.tasks == detector.tasks
+    assert torch.equal(loaded.score(END, 'Flip the Cube'), detector.score(END, 'Flip the Cube'))
+    assert loaded.hold_frames == 2
+
+def test_from_episodes():
+    actions = [{'action': [float(i)] * 6, 'task_index': i // 3} for i in range(6)]
+    dataset = SimpleNamespace(
+        hf_dataset=SimpleNamespace(select_columns=lambda columns: actions),
+        episode_data_index={'from': torch.tensor([0, 3]), 'to': torch.tensor([3, 6])},
+        meta=SimpleNamespace(tasks={0: 'Flip the Cube', 1: 'Rotate Left Cube'}),
+    )
+    detector = EndPoseDetector.from_episodes(dataset, max_derivation=1.)
+    assert detector.tasks == ['Flip the Cube', 'Rotate Left Cube']
+    assert detector.targets[:, 0].tolist() == [2., 5.]
+    assert detector.is_end([5.] * 6, 'Rotate Left Cube')
+    assert not detector.is_end([5.] * 6, 'Flip the Cube')
+
+def test_evaluate_episodes():
+    detector = EndPoseDetector([{'task': ANY_TASK, 'target': END, 'weight': [1.] * 6}], max_derivation=30.)
+    approach = torch.linspace(0, 1, 20)[:, None] * (torch.tensor(END) - torch.tensor(FAR)) + torch.tensor(FAR)
+    good = torch.cat([approach, torch.tensor(END).repeat(10, 1)])  # settles at frame 19
+    early = torch.cat([torch.tensor(END).repeat(5, 1), approach.flip(0), approach])  # passes the end pose early
+    never = torch.tensor(FAR).repeat(30, 1)
+    actions = torch.cat([good, early, never])
+    episodes = [(0, 30, 'flip'), (30, 75, 'flip'), (75, 105, 'rotate')]
+    results = evaluate_episodes(detector, actions, episodes, fps=10, thresholds=[30., 1e9], tolerance_s=0.2)
+
+    flip = results[30.]['flip']
+    assert (flip['episodes'], flip['detected'], flip['false_positives']) == (2, 1, 1)
+    assert flip['latency_mean_s'] == 0.
+    assert results[30.]['rotate']['missed'] == 1
+    # every frame is an end pose at an infinite threshold
+    assert results[1e9]['flip']['false_positive_rate'] == 1.
@@ -0,0 +1,56 @@
+import os
+import time
+
+import numpy as np
+
+from frame_archiver import FrameArchiver, parse_frame_name
+
+
+def wait_written(archiver, n, timeout=5.):
+    end = time.time() + timeout
+    while archiver.written < n and time.time() < end:
+        time.sleep(0.005)
+
+
+def test_sampling(tmp_path):
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    with FrameArchiver(tmp_path, every_n=5, session='s1') as archiver:
+        kept = [archiver.frame(image, n, action=action)
+                for n, action in enumerate(['', '', 'flip', '', '', '', 'flip', 'flip'], start=1)]
+        assert archiver.exception(image, 9)
+        assert not archiver.exception(None, 10)
+    assert kept == [False, False, True, False, True, False, True, False]
+    assert sorted(os.listdir(tmp_path)) == ['s1_img_3_False_flip.jpg', 's1_img_5_False_sample.jpg',
+                                            's1_img_7_False_flip.jpg', 's1_img_9_exception.jpg']
+
+def test_directory_is_size_capped(tmp_path):
+    image = np.random.default_rng(0).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+    with FrameArchiver(tmp_path, every_n=1, codec='png', max_bytes=30_000, session='s1') as archiver:
+        for n in range(20):
+            archiver.frame(image, n)
+            wait_written(archiver, n + 1)
+    sizes = [os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)]
+    assert sum(sizes) <= 30_000
+    assert 's1_img_19_False_sample.png' in os.listdir(tmp_path)
+
+def test_restart_with_same_names(tmp_path):
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    for _ in range(2):
+        with FrameArchiver(tmp_path, every_n=1, session='same') as archiver:
+            archiver.frame(image, 0)
+    assert os.listdir(tmp_path) == ['same_img_0_False_sample.jpg']
+    assert [path for path, _ in archiver._files] == [str(tmp_path / 'same_img_0_False_sample.jpg')]
+    assert archiver._bytes == os.path.getsize(tmp_path / 'same_img_0_False_sample.jpg')
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    archiver = FrameArchiver(tmp_path, every_n=1, queue_size=2)  # not started, nothing drains the queue
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+    assert [archiver.frame(image, n) for n in range(4)] == [True, True, False, False]
+    assert archiver.dropped == 2
+
+def test_parse_frame_name():
+    assert parse_frame_name('20261017-101010_img_12_True_sample_flip.jpg') == ('20261017-101010', 12, True)
+    assert parse_frame_name('img_3_0.png') == ('', 3, False)
+    assert parse_frame_name('img_4_1.png') == ('', 4, True)
+    assert parse_frame_name('s1_img_9_exception.jpg') is None
+    assert parse_frame_name('img_10_15.png') is None
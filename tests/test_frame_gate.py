@@ -0,0 +1,38 @@
+import numpy as np
+
+from frame_gate import FrameGate
+
+
+def scene(value=100, noise=0, seed=0):
+    image = np.full((480, 640, 3), value, dtype=np.uint8)
+    if noise:
+        rng = np.random.default_rng(seed)
+        image = np.clip(image + rng.integers(-noise, noise + 1, image.shape), 0, 255).astype(np.uint8)
+    return image
+
+
+def test_holds_back_static_scene():
+    gate = FrameGate(max_skip=100)
+    assert gate.changed(scene())
+    # sensor noise averages out in the thumbnail
+    assert not any(gate.changed(scene(noise=10, seed=i)) for i in range(10))
+    moved = scene()
+    moved[100:300, 200:400] = 220
+    assert gate.changed(moved)
+    assert (gate.passed, gate.skipped) == (2, 10)
+
+def test_timeout_and_force():
+    gate = FrameGate(max_skip=3)
+    assert [gate.changed(scene()) for _ in range(6)] == [True, False, False, False, True, False]
+    gate.force()
+    assert gate.changed(scene())
+
+def test_roi_ignores_changes_outside():
+    gate = FrameGate(roi=(0, 0, 320, 240))
+    gate.changed(scene())
+    outside = scene()
+    outside[300:, 400:] = 0
+    assert not gate.changed(outside)
+    inside = scene()
+    inside[:200, :300] = 0
+    assert gate.changed(inside)
@@ -0,0 +1,69 @@
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from frame_ring import FrameRing, SharedFrames
+
+
+def test_latest_returns_newest_complete_frame():
+    ring = FrameRing(shape=(4, 4, 3), n_slots=3)
+    assert ring.latest() is None
+    for i in range(1, 3):
+        ring.write(torch.full((4, 4, 3), i, dtype=torch.uint8))
+    frame = ring.latest()
+    assert frame.number == 2
+    assert int(frame.data[0, 0, 0]) == 2
+    assert ring.latest() is None
+
+def test_latest_is_a_view():
+    ring = FrameRing(shape=(4, 4, 3), n_slots=3)
+    ring.write(torch.ones((4, 4, 3), dtype=torch.uint8))
+    frame = ring.latest()
+    assert frame.data.data_ptr() == ring.frames[frame.number % ring.n_slots].data_ptr()
+
+def test_incomplete_slot_is_skipped():
+    ring = FrameRing(shape=(4, 4, 3), n_slots=3)
+    ring.write(torch.ones((4, 4, 3), dtype=torch.uint8))
+    ring.write(torch.ones((4, 4, 3), dtype=torch.uint8) * 2)
+    ring.complete[2] = False  # writer still busy with frame 2
+    assert ring.latest().number == 1
+
+def test_dropped_and_overwritten_frames():
+    ring = FrameRing(shape=(4, 4, 3), n_slots=3)
+    ring.write(torch.zeros((4, 4, 3), dtype=torch.uint8))
+    first = ring.latest()
+    for _ in range(4):
+        ring.write(torch.zeros((4, 4, 3), dtype=torch.uint8))
+    assert not ring.is_intact(first)
+    frame = ring.latest()
+    assert frame.number == 5
+    assert frame.dropped == 3
+    assert ring.dropped == 3
+    assert ring.is_intact(frame)
+
+def _writer(ring, n):
+    for i in range(n):
+        ring.write(torch.full(ring.shape, i % 256, dtype=torch.uint8))
+
+def test_frames_cross_processes():
+    ring = FrameRing(shape=(48, 64, 3), n_slots=4)
+    ctx = mp.get_context('spawn')
+    p = ctx.Process(target=_writer, args=(ring, 50))
+    p.start()
+    p.join()
+    frame = ring.latest()
+    assert frame.number == 50
+    assert bool((frame.data == 49).all())
+
+def test_shared_frames_views():
+    shared = SharedFrames({'front': (48, 64), 'top': (24, 32)}, views={'front': [0.5]})
+    assert sorted(shared.cameras) == ['front', 'top']
+    observation = {'front': np.full((48, 64, 3), 7, dtype=np.uint8),
+                   'top': np.full((24, 32, 3), 9, dtype=np.uint8),
+                   'gripper.pos': 100.}
+    shared.write(observation)
+    front, small, top = shared.latest('front'), shared.latest('front', 0.5), shared.latest('top')
+    assert tuple(small.data.shape) == (24, 32, 3)
+    assert int(small.data[0, 0, 0]) == 7
+    assert int(top.data[0, 0, 0]) == 9
+    assert front.timestamp_ns == small.timestamp_ns
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+import requests
+
+from xarm.xarm_remote.bus_servo_async import AsyncBusServoHttp
+
+from xarm.xarm_remote.bus_servo_http import BusServoHttp
+from xarm.xarm_remote.bus_servo_http_server import BusServoHttpServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    with BusServoHttpServer(latency=0.) as server:
+        yield server
+
+def test_get_positions(server):
+    servo = BusServoHttp(server.address)
+    assert servo.get_positions() == [500] * 6
+    assert servo.get_position(1) == 500
+
+def test_run_batch(server):
+    servo = BusServoHttp(server.address)
+    results = servo.run_batch([('run', [1, 100, 0]), ('run', [2, 200, 0]), ('get_positions', [])])
+    assert results[2][:2] == [100, 200]
+    servo.run_mult([[3, 300], [4, 400]], 0)
+    assert servo.get_positions()[2:4] == [300, 400]
+
+def test_keep_alive(server):
+    servo = BusServoHttp(server.address)
+    for _ in range(5):
+        servo.get_positions()
+    assert len(servo.session.adapters['http://'].poolmanager.pools) == 1
+
+def test_backoff_after_failure():
+    servo = BusServoHttp('http://127.0.0.1:9', timeout=0.1)
+    with pytest.raises(ConnectionError):
+        servo.run_command('get_positions', [])
+    assert servo._retry_at > 0
+    with pytest.raises(ConnectionError, match='backoff'):
+        servo.run(1, 100, 0)
+
+def test_board_without_batch():
+    with BusServoHttpServer(latency=0., batch=False) as server:
+        servo = BusServoHttp(server.address)
+        servo.run_mult([[1, 100], [2, 200]], 0)
+        assert not servo.batch_supported
+        assert servo.get_positions()[:2] == [100, 200]
+        servo.run_batch([('run', [3, 300, 0]), ('run', [4, 400, 0])])
+        assert servo.get_positions()[2:4] == [300, 400]
+
+def test_board_errors_do_not_back_off(server):
+    servo = BusServoHttp(server.address)
+    with pytest.raises(Exception, match='board error for run_mult'):
+        servo.run_mult([[9, 100]], 0)
+    with pytest.raises(requests.HTTPError):
+        servo.run_command('no_such_method', [])
+    assert len(servo.get_positions()) == 6
+
+def test_async_http(server):
+    async def main():
+        async with AsyncBusServoHttp(server.address) as servo:
+            await servo.run(5, 250, 0)
+            # requests share the keep-alive connection one after the other
+            return await asyncio.gather(servo.get_positions(), servo.get_position(5), servo.get_position(6))
+
+    positions, position, other = asyncio.run(main())
+    assert len(positions) == 6 and positions[4] == 250
+    assert position == 250 and other == positions[5]
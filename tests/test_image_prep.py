@@ -0,0 +1,27 @@
+import cv2
+import numpy as np
+
+from image_prep import ImagePrep
+
+
+def test_matches_planner_conversions():
+    rgb = np.random.default_rng(0).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+    bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    prep = ImagePrep(rgb.shape)
+    image = prep.prepare(rgb)
+    assert image.shape == (64, 48, 3)
+    assert np.array_equal(image, cv2.rotate(bgr, cv2.ROTATE_90_CLOCKWISE))
+    assert np.array_equal(prep.to_rgb(image), cv2.rotate(rgb, cv2.ROTATE_90_CLOCKWISE))
+
+    unrotated = ImagePrep(rgb.shape, rotate=False)
+    assert np.array_equal(unrotated.prepare(rgb), bgr)
+
+def test_buffers_are_reused():
+    prep = ImagePrep((48, 64))
+    first = prep.prepare(np.zeros((48, 64, 3), dtype=np.uint8))
+    canvas = prep.canvas()
+    canvas[:] = 255  # drawing does not touch the prepared image
+    assert first.max() == 0
+    second = prep.prepare(np.ones((48, 64, 3), dtype=np.uint8))
+    assert second is first
+    assert prep.canvas() is canvas
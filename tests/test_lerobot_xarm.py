@@ -1,6 +1,9 @@
+import time
+
 import pytest
 
 from xarm import XArmFollowerConfig, XArmFollower
+from xarm.lerobot.xarm_bus_threaded import ThreadedXArmBus
 from xarm.lerobot.config_xarm_leader import XArmLeaderConfig
 from xarm.lerobot.xarm_teleop import XArmLeader
 
@@ -33,3 +36,74 @@ def test_get_action(xarm_leader):
 def test_default_position_tasks(xarm_follower):
     xarm_follower.connect()
     xarm_follower.move_to_default_position('Rotate top_left')
+
+
+class FakeCamera:
+    def __init__(self, delay=0.):
+        self.delay = delay
+        self.reads = 0
+
+    def async_read(self):
+        self.reads += 1
+        time.sleep(self.delay)
+        return f'frame {self.reads}'
+
+
+class FakeBus:
+    def __init__(self, config, delay=0.):
+        self.config = config
+        self.delay = delay
+        self.reads = 0
+
+    def read_positions(self):
+        self.reads += 1
+        time.sleep(self.delay)
+        return {joint: 500. for joint in self.config.joint2motorid}
+
+
+class FakeCachedBus(ThreadedXArmBus):
+    """Threaded bus without a worker, each read returns a cache the given seconds old."""
+
+    def __init__(self, config, ages):
+        super().__init__(config)
+        self.ages = list(ages)
+        self.reads = 0
+
+    def read_positions(self):
+        self.reads += 1
+        self._positions_t = time.perf_counter() - self.ages.pop(0)
+        return {joint: 500. for joint in self.config.joint2motorid}
+
+    def read_positions_timestamped(self):
+        return {joint: 500. for joint in self.config.joint2motorid}, self._positions_t
+
+
+def concurrent_follower(make_bus):
+    config = XArmFollowerConfig(concurrent_observation=True, max_observation_skew_ms=20.)
+    follower = XArmFollower(config)
+    follower.bus = make_bus(config)
+    follower.cameras = {'front': FakeCamera(), 'side': FakeCamera()}
+    return follower
+
+
+def test_slow_read_does_not_count_as_skew():
+    # the bus answers 100 ms after the cameras, but all sources were sampled at the same time
+    follower = concurrent_follower(lambda config: FakeBus(config, delay=0.1))
+    obs = follower.get_observation()
+    assert obs['front'] == 'frame 1' and obs['gripper.pos'] == 500.
+    assert follower.bus.reads == 1 and [cam.reads for cam in follower.cameras.values()] == [1, 1]
+    timestamps = follower.observation_timestamps
+    assert max(timestamps.values()) - min(timestamps.values()) < 0.02
+
+
+def test_only_skewed_sources_are_read_again():
+    # the first bus sample is an old cache entry, only the bus is read again
+    follower = concurrent_follower(lambda config: FakeCachedBus(config, [0.1, 0.]))
+    follower.get_observation()
+    assert follower.bus.reads == 2 and [cam.reads for cam in follower.cameras.values()] == [1, 1]
+
+    # retries are bounded, the skewed sample is kept once they run out
+    follower = concurrent_follower(lambda config: FakeCachedBus(config, [0.1] * 3))
+    follower.get_observation()
+    assert follower.bus.reads == 1 + follower.config.max_observation_retries
+    assert follower.observation_timestamps['front'] - follower.observation_timestamps['state'] > 0.05
@@ -2,6 +2,9 @@ import time
 
 from xarm import XArmFollowerConfig
 from xarm.lerobot.xarm_bus import XArmBus
+from xarm.lerobot.xarm_bus_threaded import ThreadedXArmBus
+from xarm.xarm_remote.bus_servo_emulator import BusServoEmulator
+from xarm.xarm_remote.bus_servo_http_server import BusServoHttpServer
 import pytest
 
 @pytest.fixture(scope='module')
@@ -44,4 +47,124 @@ def test_write_positions(xarm: XArmBus):
     xarm.write_positions(position_default_close, servo_runtime=400)
     time.sleep(0.45)
     positions = xarm.read_positions()
-    assert abs(positions['gripper'] - position_default_close['gripper']) < 40
\ No newline at end of file
+    assert abs(positions['gripper'] - position_default_close['gripper']) < 40
+
+def test_write_positions_batched():
+    config = XArmFollowerConfig(batched_write=True)
+    xarm = XArmBus(config)
+    xarm.connect()
+    position  =     {'gripper': 100.0,
+                     'joint_1': 500.0,
+                     'joint_2': 500.0,
+                     'joint_3': 500.0,
+                     'joint_4': 500.0,
+                     'joint_5': 500.0}
+    xarm.write_positions(position, servo_runtime=400)
+    time.sleep(0.45)
+    positions = xarm.read_positions()
+    for joint, pos in position.items():
+        assert abs(positions[joint] - pos) < 40
+
+
+def test_threaded_bus():
+    config = XArmFollowerConfig(threaded_bus=True)
+    xarm = ThreadedXArmBus(config)
+    xarm.connect()
+    positions, t = xarm.read_positions_timestamped()
+    assert len(positions) == 6
+    time.sleep(0.1)
+    assert xarm.read_positions_timestamped()[1] > t
+
+    start = time.perf_counter()
+    xarm.write_positions({'gripper': 100.0}, servo_runtime=400)
+    assert time.perf_counter() - start < 0.005
+    xarm.disconnect()
+
+
+def test_threaded_bus_reads_through_the_bus_and_reconnects():
+    with BusServoEmulator(latency=0.) as emulator:
+        config = XArmFollowerConfig(port=emulator.port, connection_type='auto', auto_transports=['serial'],
+                                    auto_probe_count=5, threaded_bus=True, bus_stats=True, bus_poll_hz=50.)
+        xarm = ThreadedXArmBus(config)
+        xarm.connect()
+        time.sleep(0.05)
+        assert xarm.stats.snapshot()['get_positions']['n'] > 0
+
+        # the worker's reads feed the degradation check, the re-probe runs on the worker
+        emulator.latency = 0.05
+        time.sleep((config.auto_reprobe_reads + 2) * 0.07)
+        assert xarm.reprobe_pending
+        emulator.latency = 0.
+        assert xarm.reprobe() is False
+        assert not xarm.reprobe_pending and len(xarm.read_positions()) == 6
+
+        xarm.disconnect()
+        assert xarm.xarm is None and not xarm.is_connected()
+        xarm.connect()
+        assert len(xarm.read_positions()) == 6
+        xarm.disconnect()
+
+
+def test_threaded_bus_drops_only_position_writes():
+    config = XArmFollowerConfig(threaded_bus=True, bus_command_queue_size=3)
+    xarm = ThreadedXArmBus(config)
+    # no worker running, the queue only fills up
+    xarm.disable_torque()
+    for gripper in (100., 200., 300.):
+        xarm.write_positions({'gripper': gripper})
+    queued = [(fn.__name__, args) for fn, args, _ in xarm._commands.queue]
+    assert [name for name, _ in queued] == ['disable_torque', 'write_positions', 'write_positions']
+    assert [args[0]['gripper'] for name, args in queued[1:]] == [200., 300.]
+
+
+def test_auto_transport_selection():
+    with BusServoEmulator(latency=0.005) as emulator, BusServoHttpServer(latency=0.) as server:
+        config = XArmFollowerConfig(port=emulator.port, address=server.address, connection_type='auto',
+                                    auto_transports=['serial', 'http'], auto_probe_count=5)
+        xarm = XArmBus(config)
+        xarm.connect()
+        assert set(xarm.probe_results) == {'serial', 'http'}
+        assert xarm.connection_type == 'http'
+        assert len(xarm.read_positions()) == 6
+
+        # http link degrades, the next reads flag a re-probe, which switches to serial once run
+        server.latency = 0.5
+        for _ in range(config.auto_reprobe_reads):
+            xarm.read_positions()
+        assert xarm.reprobe_pending and xarm.connection_type == 'http'
+        assert xarm.reprobe()
+        assert xarm.connection_type == 'serial'
+        assert not xarm.reprobe_pending
+        xarm.disconnect()
+
+
+def test_reprobe_keeps_transport_when_nothing_is_usable():
+    with BusServoHttpServer(latency=0.) as server:
+        config = XArmFollowerConfig(address=server.address, connection_type='auto',
+                                    auto_transports=['http'], auto_probe_count=5)
+        xarm = XArmBus(config)
+        xarm.connect()
+        server.servos = None  # every read fails
+        assert not xarm.reprobe()
+        assert xarm.connection_type == 'http' and xarm.xarm is not None
+
+
+def test_read_within_budget_stays_in_sync():
+    with BusServoEmulator(latency=0.) as emulator:
+        config = XArmFollowerConfig(port=emulator.port, connection_type='serial')
+        xarm = XArmBus(config)
+        xarm.connect()
+        assert xarm.read_positions_within(0.1) == ({joint: 500. for joint in xarm.read_positions()}, False)
+
+        emulator.latency = 0.3
+        start = time.perf_counter()
+        positions, stale = xarm.read_positions_within(0.005)
+        assert stale and time.perf_counter() - start < 0.05
+
+        # the late reply is drained, not taken for the answer to the following commands
+        emulator.latency = 0.
+        assert xarm.read_positions_within(0.5)[1] is False
+        xarm.write_positions({'gripper': 100.0}, servo_runtime=0)
+        positions, stale = xarm.read_positions_within(0.1)
+        assert not stale and positions['gripper'] == 100.
+        xarm.disconnect()
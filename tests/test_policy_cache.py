@@ -0,0 +1,40 @@
+import torch
+
+from policy_cache import PolicyCache, policy_bytes
+
+
+def make_cache(**kwargs):
+    loaded, warmed = [], []
+    def load(key):
+        loaded.append(key)
+        return torch.nn.Linear(256, 256)  # ~257 kB of float32 parameters
+    cache = PolicyCache(load, warm_up=lambda policy, key: warmed.append(key), **kwargs)
+    return cache, loaded, warmed
+
+
+def test_loads_lazily_and_warms_up_once():
+    cache, loaded, warmed = make_cache()
+    assert len(cache) == 0
+    policy = cache.get('flip')
+    assert cache.get('flip') is policy
+    assert loaded == warmed == ['flip']
+
+def test_lru_eviction_by_count():
+    cache, loaded, _ = make_cache(max_policies=2)
+    cache.get('flip')
+    cache.get('rotate')
+    cache.get('flip')  # rotate is now least recently used
+    cache.get('center')
+    assert 'rotate' not in cache
+    assert 'flip' in cache and 'center' in cache
+    assert cache.evictions == 1
+
+def test_memory_cap_keeps_requested_policy():
+    size = policy_bytes(torch.nn.Linear(256, 256))
+    cache, _, _ = make_cache(max_bytes=int(1.5 * size))
+    cache.get('flip')
+    cache.get('rotate')
+    assert list(cache._policies) == ['rotate']
+    cache, _, _ = make_cache(max_bytes=size // 2)
+    assert cache.get('flip') is not None
+    assert len(cache) == 1
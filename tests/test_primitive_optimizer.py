@@ -0,0 +1,60 @@
+import random
+
+from action_channel import ACTION_IDS
+from primitive_optimizer import (DEFAULT_COSTS, PRIMITIVES, _blocks, _orientations, face_turns, optimize, parse,
+                                 simplify)
+
+
+def canonical(moves):
+    # turns of opposite faces commute, compare them in a fixed order
+    return [sorted(block) for block in _blocks(moves)]
+
+
+def test_simplify_merges_and_cancels():
+    assert simplify(parse("R R")) == [('R', 2)]
+    assert simplify(parse("R U U' R'")) == []
+    # L commutes with R, so the two R turns merge around it
+    assert simplify(parse("R L R")) == [('R', 2), ('L', 1)]
+    assert simplify(parse("R U R")) == [('R', 1), ('U', 1), ('R', 1)]
+
+def test_orientation_graph_is_complete():
+    assert len(_orientations()) == 24
+
+def test_model_follows_the_robot_tasks():
+    assert set(PRIMITIVES) == set(ACTION_IDS)
+    # both upper rotations run the left turn task on the robot
+    assert PRIMITIVES['rotate_upper_right'] == PRIMITIVES['rotate_upper_left'] == 'U'
+    assert DEFAULT_COSTS['flip'] == 20 + 60
+
+def test_top_face_needs_no_reorientation():
+    assert optimize("U") == (['rotate_upper_left'], DEFAULT_COSTS['rotate_upper_left'])
+    assert optimize("U'")[0] == ['rotate_upper_left'] * 3
+    assert len(optimize("U2")[0]) == 2
+
+def test_front_turn_uses_one_flip():
+    primitives, cost = optimize("F")
+    assert primitives == ['flip', 'rotate_upper_left']
+    assert cost == DEFAULT_COSTS['flip'] + DEFAULT_COSTS['rotate_upper_left']
+
+def test_redundant_turns_cost_nothing():
+    assert optimize("R R'") == ([], 0.)
+
+def test_commuting_faces_are_reordered():
+    # after U, D is reached with two flips; doing D first and U last would need the same flips
+    # plus two more to bring U back up, so the order U D is kept
+    primitives, _ = optimize("D U")
+    assert primitives[0] == 'rotate_upper_left'
+
+def test_primitives_perform_the_solution():
+    rng = random.Random(0)
+    for _ in range(50):
+        solution = ' '.join(rng.choice('UDFBLR') + rng.choice(['', "'", '2']) for _ in range(20))
+        primitives, cost = optimize(solution)
+        assert canonical(face_turns(primitives)) == canonical(simplify(parse(solution)))
+        assert cost == sum(DEFAULT_COSTS[p] for p in primitives)
+
+def test_costs_change_the_plan():
+    assert optimize("R") == (['rotate_left', 'flip', 'rotate_upper_left'], 320.)
+    # three flips replace the flip in the other direction once rotating left gets expensive
+    expensive_left = dict(DEFAULT_COSTS, rotate_left=1000)
+    assert optimize("R", costs=expensive_left)[0] == ['rotate_right'] + ['flip'] * 3 + ['rotate_upper_left']
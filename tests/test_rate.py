@@ -0,0 +1,52 @@
+import time
+
+from xarm.utils.rate import RateScheduler
+
+
+class FakeClock:
+    """Advances by step on every read, like a spinning loop sees a real clock do."""
+
+    def __init__(self, step=1e-5):
+        self.now = 0.
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_holds_rate_without_drift():
+    clock = FakeClock()
+    rate = RateScheduler(fps=200, clock=clock, sleep=clock.sleep)
+    while rate.ticks < 100:
+        clock.sleep(0.001)  # work shorter than the period
+        rate.sleep()
+    assert abs(rate.elapsed - 0.5) < 1e-3
+    stats = rate.stats()
+    assert stats['overruns'] == 0
+    assert stats['jitter_max_ms'] < 0.1
+
+def test_holds_rate_in_real_time():
+    rate = RateScheduler(fps=200)
+    while rate.elapsed < 0.5:
+        time.sleep(0.001)
+        rate.sleep()
+    # a loaded machine may oversleep any number of ticks, but the scheduler never runs ahead of the clock
+    assert 0 < rate.ticks + rate.skipped <= 101
+
+def test_overrun_is_counted_and_skipped():
+    clock = FakeClock()
+    rate = RateScheduler(fps=100, clock=clock, sleep=clock.sleep)
+    rate.sleep()
+    clock.sleep(0.035)  # misses this and the next two deadlines
+    assert rate.sleep() > 0
+    assert rate.overruns == 1
+    assert rate.skipped == 2
+    # back on the grid without a burst of catch up ticks
+    start = clock.now
+    rate.sleep()
+    assert clock.now - start > 0.002
+    assert rate.overruns == 1
@@ -0,0 +1,94 @@
+import time
+
+import torch.multiprocessing as mp
+
+from supervisor import Supervisor, beat
+
+
+def steady_stage(ready=None, heartbeat=None):
+    ready.set()
+    while True:
+        beat(heartbeat)
+        time.sleep(0.05)
+
+def crashing_stage(crashes, ready=None, heartbeat=None):
+    ready.set()
+    beat(heartbeat)
+    with crashes.get_lock():
+        crashes.value += 1
+        first_run = crashes.value == 1
+    if first_run:
+        raise RuntimeError('stage crashed')
+    steady_stage(ready, heartbeat)
+
+def crash_before_ready_stage(crashes, ready=None, heartbeat=None):
+    with crashes.get_lock():
+        crashes.value += 1
+        first_run = crashes.value == 1
+    if first_run:
+        raise RuntimeError('stage crashed while initialising')
+    steady_stage(ready, heartbeat)
+
+def hanging_stage(ticks, ready=None, heartbeat=None):
+    ready.set()
+    for _ in range(ticks):
+        beat(heartbeat)
+        time.sleep(0.05)
+    time.sleep(60)
+
+def silent_stage(ready=None, heartbeat=None):
+    ready.set()
+    time.sleep(60)
+
+
+def test_ready_and_restart_failed_stage_only():
+    ctx = mp.get_context('spawn')
+    crashes = ctx.Value('i', 0)
+    supervisor = Supervisor(poll=0.05, ctx=ctx)
+    supervisor.add('steady', steady_stage)
+    supervisor.add('crashing', crashing_stage, args=(crashes,))
+    supervisor.start()
+    try:
+        assert supervisor.wait_ready(timeout=30)
+        steady_pid = supervisor.stages['steady'].process.pid
+        supervisor.stages['crashing'].process.join(30)
+        supervisor.check()
+        assert supervisor.stages['crashing'].restarts == 1
+        assert supervisor.stages['crashing'].ready.wait(30)
+        assert supervisor.stages['steady'].restarts == 0
+        assert supervisor.stages['steady'].process.pid == steady_pid
+    finally:
+        supervisor.stop()
+    assert crashes.value == 2
+
+def test_missing_heartbeat_restarts_stage():
+    ctx = mp.get_context('spawn')
+    supervisor = Supervisor(heartbeat_timeout=0.5, poll=0.05, ctx=ctx)
+    supervisor.add('silent', silent_stage)
+    supervisor.start()
+    try:
+        assert supervisor.wait_ready(timeout=30)
+        time.sleep(0.6)
+        supervisor.check()
+        assert supervisor.stages['silent'].restarts == 1
+    finally:
+        supervisor.stop()
+
+def test_wait_ready_restarts_stage_crashing_while_initialising():
+    ctx = mp.get_context('spawn')
+    crashes = ctx.Value('i', 0)
+    supervisor = Supervisor(poll=0.05, ctx=ctx)
+    supervisor.add('crashing', crash_before_ready_stage, args=(crashes,))
+    supervisor.start()
+    try:
+        assert supervisor.wait_ready(timeout=30, supervise=True)
+        assert supervisor.stages['crashing'].restarts == 1
+    finally:
+        supervisor.stop()
+
+def test_run_restarts_stage_hanging_after_ready():
+    ctx = mp.get_context('spawn')
+    supervisor = Supervisor(heartbeat_timeout=0.5, poll=0.05, ctx=ctx)
+    supervisor.add('hanging', hanging_stage, args=(5,))
+    supervisor.run(duration=5.)
+    assert supervisor.stages['hanging'].restarts >= 1
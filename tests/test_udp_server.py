@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from xarm.utils.bus_stats import BusStats
+from xarm.xarm_remote.bus_servo_async import AsyncBusServoSocket
+from xarm.xarm_remote.bus_servo_udp_server import BusServoUdpServer
+from xarm.xarm_remote.bus_servo_websocket import BusServoSocket
+
+
+@pytest.fixture
+def server():
+    with BusServoUdpServer(latency=0.) as server:
+        yield server
+
+def test_legacy_protocol(server):
+    servo = BusServoSocket(server.host, server.port, timeout=1)
+    assert servo.get_positions() == [500] * 6
+    servo.run(1, 100, 0)
+    assert servo.get_position(1) == 100
+
+def test_async_socket(server):
+    async def main():
+        async with AsyncBusServoSocket(server.host, server.port, timeout=1) as servo:
+            await servo.run(3, 250, 0)
+            return await asyncio.gather(servo.get_positions(), servo.get_position(3))
+
+    positions, position = asyncio.run(main())
+    assert positions[2] == 250
+    assert position == 250
+
+def test_sequenced_protocol(server):
+    servo = BusServoSocket(server.host, server.port, sequenced=True)
+    servo.run_mult([[1, 100], [2, 200]], 0)
+    assert servo.get_positions()[:2] == [100, 200]
+
+def test_pipelined_requests(server):
+    servo = BusServoSocket(server.host, server.port, sequenced=True)
+    results = servo.run_commands([('run', [id, 100 * id, 0]) for id in range(1, 7)] + [('get_positions', [])])
+    assert results[-1] == str([100, 200, 300, 400, 500, 600])
+
+def test_retransmit_is_not_executed_twice(server):
+    servo = BusServoSocket(server.host, server.port, sequenced=True)
+    servo.s.send(b'7|run_add_or_dec-1,10')
+    first = servo.s.recv(1024)
+    servo.s.send(b'7|run_add_or_dec-1,10')
+    assert servo.s.recv(1024) == first
+    assert server.commands == 1
+
+def test_long_reply_is_reassembled():
+    with BusServoUdpServer(latency=0., max_payload=4) as server:
+        servo = BusServoSocket(server.host, server.port, sequenced=True)
+        assert servo.get_positions() == [500] * 6
+
+def test_retransmit_lost_datagrams():
+    with BusServoUdpServer(latency=0., loss=0.3, seed=1) as server:
+        servo = BusServoSocket(server.host, server.port, sequenced=True, request_timeout=0.02, retransmits=20)
+        servo.stats = BusStats()
+        for _ in range(20):
+            assert servo.get_positions() == [500] * 6
+        assert servo.stats.snapshot()['get_positions']['retries'] > 0
+
+def test_timeout_without_server():
+    with BusServoUdpServer(latency=0., loss=1.) as server:
+        servo = BusServoSocket(server.host, server.port, sequenced=True, request_timeout=0.01, retransmits=2)
+        with pytest.raises(TimeoutError):
+            servo.get_positions()